@@ -0,0 +1,119 @@
+"""
+Citation analytics of the papers in the database. The references of the papers are
+turned into a sparse CSR citation matrix over dense paper indices, and citation
+counts, PageRank and co-citations are computed with sparse linear algebra.
+Citations of papers outside the database are ignored.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from ci_mapping.utils.cooccurrence import cooccurrence_pairs
+
+
+def citation_matrix(papers):
+    """Creates the citation matrix of a set of papers.
+
+    Args:
+        papers (`pd.DataFrame`): `id` and `references` (list of cited paper IDs or
+            missing) of each paper.
+
+    Returns:
+        C (`scipy.sparse.csr_matrix`): C[i, j] is 1 if paper i cites paper j.
+            Self-citations are dropped.
+        ids (`pd.Index`): ID of the paper of each row and column.
+
+    """
+    ids = pd.Index(papers.id.unique(), name="id")
+    edges = papers[["id", "references"]].explode("references").dropna()
+
+    citing = ids.get_indexer(edges.id)
+    cited = ids.get_indexer(edges.references.astype("int64"))
+    keep = (cited >= 0) & (cited != citing)
+
+    C = sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.int64), (citing[keep], cited[keep])),
+        shape=(len(ids), len(ids)),
+    )
+    # Papers listed twice in the references of a paper are counted once
+    C.data[:] = 1
+
+    return C, ids
+
+
+def in_corpus_citations(C):
+    """Counts the citations of each paper by the other papers of the matrix.
+
+    Args:
+        C (`scipy.sparse.csr_matrix`): Citation matrix, see `citation_matrix`.
+
+    Returns:
+        (`np.ndarray`)
+
+    """
+    return np.asarray(C.sum(axis=0)).ravel()
+
+
+def pagerank(C, damping=0.85, tol=1e-6, max_iter=100):
+    """Computes the PageRank of each paper with power iteration. The rank of papers
+    without references in the matrix is spread evenly over all papers.
+
+    Args:
+        C (`scipy.sparse.csr_matrix`): Citation matrix, see `citation_matrix`.
+        damping (float): Probability of following a citation.
+        tol (float): The iteration stops when the rank of the papers changes by
+            less than `tol` per paper.
+        max_iter (int): Maximum number of iterations.
+
+    Returns:
+        (`np.ndarray`): PageRank of each paper, summing to 1.
+
+    """
+    n = C.shape[0]
+    if n == 0:
+        return np.array([])
+
+    references = np.asarray(C.sum(axis=1)).ravel()
+    dangling = references == 0
+    weights = np.divide(1.0, references, out=np.zeros(n), where=~dangling)
+
+    # Each row holds the share of the rank of the citing papers a paper receives
+    transition = (sparse.diags(weights) @ C).T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = rank
+        spread = previous[dangling].sum() / n
+        rank = damping * (transition @ previous + spread) + (1 - damping) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+
+    return rank
+
+
+def cocitations(C, ids, min_cocitations=1):
+    """Counts how many papers cite each pair of papers together and their
+    co-citation similarity (co-citations divided by the geometric mean of the
+    citations of the two papers).
+
+    Args:
+        C (`scipy.sparse.csr_matrix`): Citation matrix, see `citation_matrix`.
+        ids (`pd.Index`): ID of the paper of each row and column.
+        min_cocitations (int): Pairs cited together fewer times are dropped.
+
+    Returns:
+        (`pd.DataFrame`): The IDs of the papers of each pair (`paper_a`,
+            `paper_b`), their co-citations (`cocitations`) and `similarity`.
+
+    """
+    # The citing papers are the groups in which the cited papers co-occur
+    rows, cols, counts = cooccurrence_pairs(C, min_cocitations)
+    citations = in_corpus_citations(C)
+
+    return pd.DataFrame(
+        {
+            "paper_a": ids[rows],
+            "paper_b": ids[cols],
+            "cocitations": counts,
+            "similarity": counts / np.sqrt(citations[rows] * citations[cols]),
+        }
+    )
@@ -0,0 +1,58 @@
+"""
+Paper-level collaboration metrics. The number of distinct countries and sectors
+(industry, non-industry) of the affiliations of each paper is computed once, and
+the share of cross-country or cross-sector papers at any granularity is derived
+from these columns.
+"""
+
+
+def paper_collaborations(paper_author_aff, aff_location):
+    """Counts the distinct countries and sectors of the affiliations of each paper.
+
+    Args:
+        paper_author_aff (`pd.DataFrame`): Author-level affiliation data.
+        aff_location (`pd.DataFrame`): Geocoded affiliations.
+
+    Returns:
+        (`pd.DataFrame`): The `type` and `year` of each paper, the number of
+            distinct countries (`n_countries`) and sectors (`n_sectors`) of its
+            affiliations, and whether they are more than one (`cross_country`,
+            `cross_sector`). Indexed by `paper_id`.
+
+    """
+    df = paper_author_aff[["paper_id", "affiliation_id", "type", "year", "non_company"]]
+    df = df.drop_duplicates(["paper_id", "affiliation_id"]).merge(
+        aff_location[["affiliation_id", "country"]]
+        .dropna()
+        .drop_duplicates("affiliation_id"),
+        on="affiliation_id",
+        how="left",
+    )
+
+    grouped = df.groupby("paper_id")
+    papers = grouped[["type", "year"]].first()
+    papers["n_countries"] = grouped["country"].nunique()
+    papers["n_sectors"] = grouped["non_company"].nunique()
+    papers["cross_country"] = papers.n_countries > 1
+    papers["cross_sector"] = papers.n_sectors > 1
+
+    return papers
+
+
+def collaboration_share(papers, metric, by=["type", "year"]):
+    """Percentage of papers with affiliations in more than one country or sector.
+    Papers without any country or sector are not counted.
+
+    Args:
+        papers (`pd.DataFrame`): Paper-level metrics, see `paper_collaborations`.
+        metric (str): `countries` or `sectors`.
+        by (:obj:`list` of str): Columns to aggregate by.
+
+    Returns:
+        (`pd.Series`): Share of cross-country or cross-sector papers, indexed by
+            `by`.
+
+    """
+    papers = papers[papers[f"n_{metric}"] > 0]
+    cross = "cross_country" if metric == "countries" else "cross_sector"
+    return papers.groupby(by, observed=True)[cross].mean() * 100
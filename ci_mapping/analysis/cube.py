@@ -0,0 +1,64 @@
+"""
+Analysis cube of the exploratory data analysis. Papers and their affiliations,
+journals and conferences are aggregated once by type (CI, AI_CI), year and an
+optional set of dimensions, and the figures are drawn from these aggregates instead
+of regrouping the raw tables.
+"""
+import pandas as pd
+
+
+def build_cube(df, dimensions=[], paper_id="paper_id", sums=[]):
+    """Aggregates a table by paper type, year and extra dimensions.
+
+    Args:
+        df (`pd.DataFrame`): Table with the `type` and `year` of each paper.
+        dimensions (:obj:`list` of str): Columns to group by besides `type` and
+            `year`.
+        paper_id (str): Column with the paper IDs.
+        sums (:obj:`list` of str): Numeric columns to sum.
+
+    Returns:
+        (`pd.DataFrame`): Number of rows (`count`) and of distinct papers
+            (`papers`) and the `sums`, indexed by `type`, `year` and `dimensions`.
+
+    """
+    grouped = df.groupby(["type", "year"] + dimensions, observed=True)
+    cube = pd.DataFrame(
+        {"count": grouped[paper_id].size(), "papers": grouped[paper_id].nunique()}
+    )
+    for col in sums:
+        cube[col] = grouped[col].sum()
+
+    return cube.sort_index()
+
+
+def analysis_cube(data, aff_papers, journals, open_access, conferences):
+    """Builds the cubes used by the EDA figures.
+
+    Args:
+        data (`pd.DataFrame`): MAG paper data.
+        aff_papers (`pd.DataFrame`): Author-level paper affiliations.
+        journals (`pd.DataFrame`): Academic journals.
+        open_access (`pd.DataFrame`): Open access flag of the journals.
+        conferences (`pd.DataFrame`): Academic conferences.
+
+    Returns:
+        (dict): Cubes by type and year (`papers`), affiliation type
+            (`affiliation_type`), open access (`open_access`), journal (`journals`)
+            and conference (`conferences`).
+
+    """
+    papers = data[["id", "year", "type"]]
+    paper_journal = papers.merge(journals, left_on="id", right_on="paper_id")
+    paper_conference = papers.merge(conferences, left_on="id", right_on="paper_id")
+    paper_open_access = paper_journal.merge(
+        open_access, left_on="id_y", right_on="id"
+    )
+
+    return {
+        "papers": build_cube(data, paper_id="id", sums=["citations"]),
+        "affiliation_type": build_cube(aff_papers, ["non_company"]),
+        "open_access": build_cube(paper_open_access, ["open_access"]),
+        "journals": build_cube(paper_journal, ["journal_name"]),
+        "conferences": build_cube(paper_conference, ["conference_name"]),
+    }
@@ -1,4 +1,4 @@
-import ast
+import json
 import numpy as np
 import pandas as pd
 from ci_mapping.data.mag_orm import (
@@ -7,61 +7,86 @@ from ci_mapping.data.mag_orm import (
     AffiliationType,
     AuthorAffiliation,
 )
-
-
-def clean_data(s):
+from ci_mapping.data.snapshot import read_table
+
+# Columns of `mag_papers` used in the analysis. Large text columns like `abstract`
+# are left out unless requested.
+PAPER_COLUMNS = [
+    "id",
+    "year",
+    "date",
+    "citations",
+    "publication_type",
+    "bibtex_doc_type",
+    "doi",
+    "publisher",
+]
+
+PUBLICATION_TYPES = {
+    "0": np.nan,
+    "1": "Journal article",
+    "2": "Patent",
+    "3": "Conference paper",
+    "4": "Book chapter",
+    "5": "Book",
+    "6": "Book reference entry",
+    "7": "Dataset",
+    "8": "Repository",
+}
+
+BIBTEX_DOC_TYPES = {
+    "a": "Journal article",
+    "b": "Book",
+    "c": "Book chapter",
+    "p": "Conference paper",
+}
+
+
+def clean_data(s, columns=PAPER_COLUMNS):
     """Cleans the main `mag_papers` table.
 
     Args:
         s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        columns (:obj:`list` of str): Columns of `mag_papers` to keep. It must
+            contain `id`, `year`, `date`, `citations`, `publication_type` and
+            `bibtex_doc_type`.
 
     Returns:
-        mag (pd.DataFrame)
+        mag (pd.DataFrame): Papers with their `type` (CI, AI_CI). `type`, `year`,
+            `publication_type` and `bibtex_doc_type` are categoricals.
 
     """
     # Read tables
-    mag = pd.read_sql(s.query(Paper).statement, s.bind)
-    flag = pd.read_sql(s.query(CoreControlGroup).statement, s.bind)
+    mag = read_table(s, Paper, columns=columns)
+    flag = read_table(s, CoreControlGroup)
 
     # Join papers with flag
     mag = mag.merge(flag, left_on="id", right_on="id")
 
     # Some columns have null values registered as 'NaN'
-    mag["bibtex_doc_type"] = mag.bibtex_doc_type.replace("NaN", np.nan)
-    mag["publisher"] = mag.publisher.replace("NaN", np.nan)
-    mag["references"] = mag.references.replace("NaN", np.nan)
-    mag["abstract"] = mag.abstract.replace("NaN", np.nan)
-    mag["doi"] = mag.doi.replace("NaN", np.nan)
+    nullable = [
+        col
+        for col in ["bibtex_doc_type", "publisher", "references", "abstract", "doi"]
+        if col in mag.columns
+    ]
+    mag[nullable] = mag[nullable].replace("NaN", np.nan)
 
     # String to list
-    mag["references"] = mag.references.apply(
-        lambda x: ast.literal_eval(x) if isinstance(x, str) else np.nan
-    )
+    if "references" in mag.columns:
+        mag["references"] = [
+            json.loads(x) if isinstance(x, str) else np.nan for x in mag.references
+        ]
 
     # Change the publication and the bibtex document types
-    publication_type_ = {
-        "0": np.nan,
-        "1": "Journal article",
-        "2": "Patent",
-        "3": "Conference paper",
-        "4": "Book chapter",
-        "5": "Book",
-        "6": "Book reference entry",
-        "7": "Dataset",
-        "8": "Repository",
-    }
-
-    bibtext_doc_type_ = {
-        "a": "Journal article",
-        "b": "Book",
-        "c": "Book chapter",
-        "p": "Conference paper",
-    }
-
-    mag["publication_type"] = mag.publication_type.apply(lambda x: publication_type_[x])
-    mag["bibtex_doc_type"] = mag.bibtex_doc_type.apply(
-        lambda x: bibtext_doc_type_[x] if isinstance(x, str) else np.nan
+    mag["publication_type"] = mag.publication_type.map(PUBLICATION_TYPES).astype(
+        "category"
+    )
+    mag["bibtex_doc_type"] = mag.bibtex_doc_type.map(BIBTEX_DOC_TYPES).astype(
+        "category"
     )
+    mag["citations"] = pd.to_numeric(mag.citations, downcast="integer")
+    mag["type"] = mag.type.astype("category")
+    mag["year"] = mag.year.astype("category")
     mag["month_year"] = pd.to_datetime(mag["date"]).dt.to_period("M")
     return mag
 
@@ -79,8 +104,8 @@ def clean_author_affiliations(s, mag_papers):
         paper_author_aff (`pd.DataFrame`): Author-level paper affiliations.
 
     """
-    aff_type = pd.read_sql(s.query(AffiliationType).statement, s.bind)
-    paper_author_aff = pd.read_sql(s.query(AuthorAffiliation).statement, s.bind)
+    aff_type = read_table(s, AffiliationType)
+    paper_author_aff = read_table(s, AuthorAffiliation)
     paper_author_aff = paper_author_aff.drop(["id"], axis=1).merge(
         aff_type, left_on="affiliation_id", right_on="id"
     )
@@ -1,29 +1,34 @@
+import os
+import numpy as np
 import pandas as pd
 import altair as alt
-import ci_mapping
 from ci_mapping import logger
 from ci_mapping.utils.utils import flatten_lists
+from ci_mapping.analysis.collaboration import collaboration_share
+from ci_mapping.analysis.figure_cache import cached_figure, output_path
 
+# Directory, relative to the figures, of the data files referenced by the charts
+CHART_DATA_DIR = "data"
 
-def annual_publication_increase(data, filename="annual_publication_increase"):
+
+@cached_figure
+def annual_publication_increase(cube, filename="annual_publication_increase"):
     """Annual increase of publications.
 
     Args:
-        data (`pd.DataFrame`): MAG paper data.
+        cube (`pd.DataFrame`): Papers by type and year, see `analysis_cube`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    frames = []
-    for cat in data.type.unique():
-        frame = pd.DataFrame(
-            data[data.type == cat].groupby("year")["id"].count()
-            / data[data.type == cat].groupby("year")["id"].count().iloc[0]
-        ).reset_index()
-        frame = pd.DataFrame(frame).rename(index=str, columns={"id": "value"})
-        frame["type"] = cat
-        frames.append(frame)
-
-    df = pd.concat(frames)
+    # Publications relative to the first year of each type
+    counts = cube["count"]
+    df = (
+        (counts / counts.groupby(level="type", observed=True).transform("first"))
+        .rename("value")
+        .reset_index()
+    )
+
+    path = output_path(filename)
 
     # Plotting
     alt.Chart(df).mark_line(point=True).encode(
@@ -36,29 +41,24 @@ def annual_publication_increase(data, filename="annual_publication_increase"):
     ).configure_legend(
         titleFontSize=12, labelFontSize=12
     ).interactive().save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
+        path
     )
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
-def annual_publication_count(data, filename="annual_publication_count"):
+@cached_figure
+def annual_publication_count(cube, filename="annual_publication_count"):
     """Annual number of publications.
 
     Args:
-        data (`pd.DataFrame`): MAG paper data.
+        cube (`pd.DataFrame`): Papers by type and year, see `analysis_cube`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    frames = []
-    for cat in data.type.unique():
-        frame = pd.DataFrame(
-            data[data.type == cat].groupby("year")["id"].count()
-        ).reset_index()
-        frame = pd.DataFrame(frame).rename(index=str, columns={"id": "value"})
-        frame["type"] = cat
-        frames.append(frame)
+    df = cube["count"].rename("value").reset_index()
 
-    df = pd.concat(frames)
+    path = output_path(filename)
 
     # Plotting
     alt.Chart(df).mark_line(point=True).encode(
@@ -69,20 +69,24 @@ def annual_publication_count(data, filename="annual_publication_count"):
     ).properties(title="Annual number of publications").configure_legend(
         titleFontSize=12, labelFontSize=12
     ).interactive().save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
+        path
     )
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
-def annual_citation_sum(data, filename="annual_citation_sum"):
+@cached_figure
+def annual_citation_sum(cube, filename="annual_citation_sum"):
     """Sum of annual citations for CI and AI+CI.
 
     Args:
-        data (`pd.DataFrame`): MAG paper data.
+        cube (`pd.DataFrame`): Papers by type and year, see `analysis_cube`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    df = pd.DataFrame(data.groupby(["year", "type"])["citations"].sum()).reset_index()
+    df = cube["citations"].reset_index()
+
+    path = output_path(filename)
 
     # Plotting
     alt.Chart(df).mark_circle(opacity=1, stroke="black", strokeWidth=0.5).encode(
@@ -99,39 +103,28 @@ def annual_citation_sum(data, filename="annual_citation_sum"):
         height=150,
         title="Total citations for CI and AI+CI papers published in a year",
     ).save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
+        path
     )
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
-def publications_by_affiliation_type(data, filename="publications_by_affiliation_type"):
+@cached_figure
+def publications_by_affiliation_type(cube, filename="publications_by_affiliation_type"):
     """
     Share of publications in CI, AI+CI by industry and non-industry affiliations.
 
     Args:
-        data (`pd.DataFrame`): Author-level affiliation data.
+        cube (`pd.DataFrame`): Papers by type, year and affiliation type, see
+            `analysis_cube`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    frames = []
-    for (num, comp) in zip([0, 1], ["non-Industry", "Industry"]):
-        for cat in data.type.unique():
-            df = data[data.non_company == num].drop_duplicates("paper_id")
-            nominator = df[df.type == cat].groupby("year")["paper_id"].count()
-            try:
-                denominator = (
-                    df[df.type == cat].groupby("year")["paper_id"].count().iloc[0]
-                )
-            except IndexError:
-                denominator = 0
-
-            frame = pd.DataFrame(nominator / denominator).reset_index()
-            frame = pd.DataFrame(frame).rename(index=str, columns={"paper_id": "value"})
-            frame["type"] = cat
-            frame["category"] = comp
-            frames.append(frame)
-
-    df = pd.concat(frames)
+    df = _relative_to_first_year(
+        cube, "non_company", {0: "non-Industry", 1: "Industry"}
+    )
+
+    path = output_path(filename)
 
     # Plotting
     alt.Chart(df).mark_point(opacity=1, filled=True, size=80).encode(
@@ -145,37 +138,29 @@ def publications_by_affiliation_type(data, filename="publications_by_affiliation
     ).configure_axis(
         labelFontSize=12, titleFontSize=12
     ).interactive().save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
+        path
     )
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
-def international_collaborations(
-    paper_author_aff, aff_location, filename="international_collaborations"
-):
+@cached_figure
+def international_collaborations(papers, filename="international_collaborations"):
     """International collaborations: % of cross-country teams in CI, AI+CI.
 
     Args:
-        paper_author_aff (`pd.DataFrame`): Author-level affiliation data.
-        aff_location (`pd.DataFrame`): Geocoded affiliations.
+        papers (`pd.DataFrame`): Paper-level collaboration metrics, see
+            `paper_collaborations`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    df = paper_author_aff.merge(
-        aff_location[["affiliation_id", "country"]],
-        left_on="affiliation_id",
-        right_on="affiliation_id",
-    )
-    df = df.drop_duplicates(["paper_id", "affiliation_id"])
-    # group countries
-    df = df.groupby(["type", "year", "paper_id"])["country"].apply(list)
-    df = pd.DataFrame(df)
-    # binary label showing if a paper had affiliations from different countries
-    df["cross_country_collab"] = df.country.apply(lambda x: 1 if len(set(x)) > 1 else 0)
-    # multiply by 100 to get the proportion
-    df = pd.DataFrame(
-        df.reset_index().groupby(["type", "year"])["cross_country_collab"].mean() * 100
-    ).reset_index()
+    df = (
+        collaboration_share(papers, "countries")
+        .rename("cross_country_collab")
+        .reset_index()
+    )
+
+    path = output_path(filename)
 
     # Plotting
     bubbles = (
@@ -202,35 +187,30 @@ def international_collaborations(
 
     (bubbles + line).configure_legend(
         titleFontSize=12, labelFontSize=12
-    ).configure_axis(labelFontSize=12, titleFontSize=12).save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
-    )
+    ).configure_axis(labelFontSize=12, titleFontSize=12).save(path)
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
+@cached_figure
 def industry_non_industry_collaborations(
-    paper_author_aff, filename="industry_non_industry_collaborations",
+    papers, filename="industry_non_industry_collaborations",
 ):
     """Industry - academia collaborations: % in CI, AI+CI
 
     Args:
-        paper_author_aff (`pd.DataFrame`): Author-level affiliation data.
+        papers (`pd.DataFrame`): Paper-level collaboration metrics, see
+            `paper_collaborations`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    df = paper_author_aff.drop_duplicates(["paper_id", "affiliation_id"])
-    # group countries
-    df = df.groupby(["type", "year", "paper_id"])["non_company"].apply(list)
-    df = pd.DataFrame(df)
-    # binary label showing if a paper had affiliations from industry and academia
-    df["industry_academia_collab"] = df.non_company.apply(
-        lambda x: 1 if len(set(x)) > 1 else 0
-    )
-    # multiply by 100 to get the proportion
-    df = pd.DataFrame(
-        df.reset_index().groupby(["type", "year"])["industry_academia_collab"].mean()
-        * 100
-    ).reset_index()
+    df = (
+        collaboration_share(papers, "sectors")
+        .rename("industry_academia_collab")
+        .reset_index()
+    )
+
+    path = output_path(filename)
 
     # Plotting
     bubbles = (
@@ -263,45 +243,23 @@ def industry_non_industry_collaborations(
 
     (bubbles + line).configure_legend(
         titleFontSize=12, labelFontSize=12
-    ).configure_axis(labelFontSize=12, titleFontSize=12).save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
-    )
+    ).configure_axis(labelFontSize=12, titleFontSize=12).save(path)
     logger.info(f"Stored {filename} plot.")
+    return [path]
 
 
-def open_access_publications(
-    data, journals, open_access, filename="open_access_publications"
-):
+@cached_figure
+def open_access_publications(cube, filename="open_access_publications"):
     """Adoption of open access by CI, AI+CI.
 
     Args:
-        data (`pd.DataFrame`): MAG paper data.
-        journals (`pd.DataFrame`): Academic journals.
-        conferences (`pd.DataFrame`): Academic conferences.
+        cube (`pd.DataFrame`): Papers by type, year and open access flag of their
+            journal, see `analysis_cube`.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    paper_journal = (
-        data[["id", "year", "type"]]
-        .merge(journals, left_on="id", right_on="paper_id")
-        .merge(open_access, left_on="id_y", right_on="id")
-    )
-
-    frames = []
-    for (num, comp) in zip([0, 1], ["Paywalled", "Preprints"]):
-        for cat in paper_journal.type.unique():
-            df = paper_journal[paper_journal.open_access == num].drop_duplicates(
-                "paper_id"
-            )
-            nominator = df[df.type == cat].groupby("year")["paper_id"].count()
-            denominator = df[df.type == cat].groupby("year")["paper_id"].count().iloc[0]
-            frame = pd.DataFrame(nominator / denominator).reset_index()
-            frame = pd.DataFrame(frame).rename(index=str, columns={"paper_id": "value"})
-            frame["type"] = cat
-            frame["category"] = comp
-            frames.append(frame)
-
-    df = pd.concat(frames)
+    df = _relative_to_first_year(cube, "open_access", {0: "Paywalled", 1: "Preprints"})
+    path = output_path(filename)
 
     alt.Chart(df).mark_point(opacity=1, filled=True, size=80).encode(
         alt.X("category:N", title=None),
@@ -313,12 +271,45 @@ def open_access_publications(
     ).configure_axis(
         labelFontSize=12, titleFontSize=12
     ).save(
-        f"{ci_mapping.project_dir}/reports/figures/{filename}.html"
+        path
     )
     logger.info(f"Stored {filename} plot.")
+    return [path]
+
+
+def _relative_to_first_year(cube, dimension, categories):
+    """Distinct papers of each type and category relative to their first year."""
+    papers = cube["papers"]
+    base = papers.groupby(level=["type", dimension], observed=True).transform("first")
+    df = (papers / base).rename("value").reset_index()
+    df = df[df[dimension].isin(categories.keys())]
+    df["category"] = df[dimension].map(categories)
+    return df.drop(dimension, axis=1)
+
+
+def _chart_data(df, name):
+    """Writes the data of a chart to a JSON file next to the figures and returns a
+    reference to it, so that the data is not embedded in the HTML file.
+
+    Args:
+        df (`pd.DataFrame`): Chart data.
+        name (str): Name of the JSON file.
+
+    Returns:
+        data (`alt.UrlData`): Reference to the JSON file.
+        path (str): Path of the JSON file.
+
+    """
+    path = output_path(f"{CHART_DATA_DIR}/{name}", extension="json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_json(path, orient="records")
+    return alt.UrlData(f"{CHART_DATA_DIR}/{name}.json"), path
 
 
 def _fos_plot(df, filename, fos_level=""):
+    data, data_path = _chart_data(
+        df[["type", "year", "name", "fraq"]], f"{filename}_{fos_level}"
+    )
 
     slider = alt.binding_range(min=2000, max=2020, step=1)
     select_year = alt.selection_single(
@@ -326,7 +317,7 @@ def _fos_plot(df, filename, fos_level=""):
     )
 
     base = (
-        alt.Chart(df)
+        alt.Chart(data)
         .add_selection(select_year)
         .transform_filter(select_year)
         .transform_calculate(
@@ -340,9 +331,9 @@ def _fos_plot(df, filename, fos_level=""):
     left = (
         base.transform_filter(alt.datum.category == "CI")
         .encode(
-            y=alt.Y("name", axis=None),
+            y=alt.Y("name:N", axis=None),
             x=alt.X(
-                "fraq",
+                "fraq:Q",
                 title="(%)",
                 sort=alt.SortOrder("descending"),
                 scale=alt.Scale(domain=[0, 100]),
@@ -354,7 +345,7 @@ def _fos_plot(df, filename, fos_level=""):
     )
 
     middle = (
-        base.encode(y=alt.Y("name", axis=None), text=alt.Text("name"),)
+        base.encode(y=alt.Y("name:N", axis=None), text=alt.Text("name:N"),)
         .mark_text()
         .properties(width=200)
     )
@@ -362,8 +353,8 @@ def _fos_plot(df, filename, fos_level=""):
     right = (
         base.transform_filter(alt.datum.category == "AI+CI")
         .encode(
-            y=alt.Y("name", axis=None),
-            x=alt.X("fraq", title="(%)", scale=alt.Scale(domain=[0, 100])),
+            y=alt.Y("name:N", axis=None),
+            x=alt.X("fraq:Q", title="(%)", scale=alt.Scale(domain=[0, 100])),
             color=alt.Color("category:N", scale=color_scale, legend=None),
         )
         .mark_bar()
@@ -375,10 +366,13 @@ def _fos_plot(df, filename, fos_level=""):
         .configure_legend(titleFontSize=12, labelFontSize=12)
         .configure_axis(labelFontSize=12, titleFontSize=12)
     )
-    f.save(f"{ci_mapping.project_dir}/reports/figures/{filename}_{fos_level}.html")
+    path = output_path(f"{filename}_{fos_level}")
+    f.save(path)
     logger.info(f"Stored {filename}_{fos_level} plot.")
+    return [data_path, path]
 
 
+@cached_figure
 def annual_fields_of_study_usage(
     data,
     pfos,
@@ -424,156 +418,139 @@ def annual_fields_of_study_usage(
     )
     df = df[df.name.isin(set(most_used_fos_by_level_and_type))]
     df = df[~df.name.isin(set(excluded_fos))]
-    df = pd.DataFrame(
-        df.groupby(["type", "year", "name", "level"])["paper_id"].count()
-    ).reset_index()
-
-    lst = []
-    for year in df.year.unique():
-        for name in df.name.unique():
-            if len(df[(df.name == name) & (df.year == year)]["type"].values) == 2:
-                continue
-            elif len(df[(df.name == name) & (df.year == year)]["type"].values) == 1:
-                if df[(df.name == name) & (df.year == year)]["type"].values[0] == "CI":
-                    lst.append(
-                        {
-                            "type": "AI_CI",
-                            "year": year,
-                            "name": name,
-                            "paper_id": 0,
-                            "level": df[df.name == name]["level"].values[0],
-                        }
-                    )
-                else:
-                    lst.append(
-                        {
-                            "type": "CI",
-                            "year": year,
-                            "name": name,
-                            "paper_id": 0,
-                            "level": df[df.name == name]["level"].values[0],
-                        }
-                    )
-            else:
-                lst.append(
-                    {
-                        "type": "AI_CI",
-                        "year": year,
-                        "name": name,
-                        "paper_id": 0,
-                        "level": df[df.name == name]["level"].values[0],
-                    }
-                )
-                lst.append(
-                    {
-                        "type": "CI",
-                        "year": year,
-                        "name": name,
-                        "paper_id": 0,
-                        "level": df[df.name == name]["level"].values[0],
-                    }
-                )
-
-    df = pd.concat([df, pd.DataFrame(lst)])
-
-    fraq = []
-    for _, row in df.iterrows():
-        fraq.append(
-            (
-                row["paper_id"]
-                / data[
-                    (data.type == row["type"]) & (data.year == str(row["year"]))
-                ].shape[0]
-            )
-            * 100
-        )
-
-    df["fraq"] = fraq
-    df = df.fillna(0)
+    counts = df.groupby(["type", "year", "name", "level"], observed=True)[
+        "paper_id"
+    ].count()
+
+    # Pad the (type, year, FoS) combinations without papers with zeros
+    types = ["AI_CI", "CI"]
+    years = counts.index.get_level_values("year").unique()
+    fos = counts.index.droplevel(["type", "year"]).unique()
+    index = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(types, len(years) * len(fos)),
+            np.tile(np.repeat(years, len(fos)), len(types)),
+            np.tile(fos.get_level_values("name"), len(types) * len(years)),
+            np.tile(fos.get_level_values("level"), len(types) * len(years)),
+        ],
+        names=counts.index.names,
+    )
+    df = counts.reindex(index, fill_value=0).reset_index()
+
+    # Share of the papers of each type published in a year
+    papers = (
+        data.assign(year=data.year.astype(int))
+        .groupby(["type", "year"], observed=True)
+        .size()
+        .rename("papers")
+        .reset_index()
+        .astype({"type": str})
+    )
+    df = df.merge(papers, on=["type", "year"], how="left")
+    df["fraq"] = (df.paper_id / df.papers * 100).fillna(0)
+    df = df.drop("papers", axis=1)
 
+    outputs = []
     if not preselected_fos:
         for fos_level in fos_levels:
-            _fos_plot(df[df.level == fos_level], filename, fos_level=fos_level)
+            outputs.extend(
+                _fos_plot(df[df.level == fos_level], filename, fos_level=fos_level)
+            )
     else:
-        _fos_plot(
-            df[df.name.isin(preselected_fos)], filename, fos_level="preselected_fos"
+        outputs.extend(
+            _fos_plot(
+                df[df.name.isin(preselected_fos)], filename, fos_level="preselected_fos"
+            )
         )
+    return outputs
 
 
+@cached_figure
 def papers_in_journals_and_conferences(
-    data, journals, conferences, top_n, filename="papers_in_journals_and_conferences",
+    journals, conferences, top_n, filename="papers_in_journals_and_conferences",
 ):
     """Annual publications in conferences and journals.
 
     Args:
-        data (`pd.DataFrame`): MAG paper data.
-        journals (`pd.DataFrame`): Academic journals.
-        conferences (`pd.DataFrame`): Academic conferences.
+        journals (`pd.DataFrame`): Papers by type, year and journal, see
+            `analysis_cube`.
+        conferences (`pd.DataFrame`): Papers by type, year and conference, see
+            `analysis_cube`.
         top_n (int): Number of most used journals and conferences to plot.
         filename (str): Name of the HTML file to store the plot.
 
     """
-    # Merge journals with mag_papers
-    paper_journal = data[["id", "year", "type"]].merge(
-        journals, left_on="id", right_on="paper_id"
-    )
-
-    # Merge conferences with mag_papers
-    paper_conference = data[["id", "year", "type"]].merge(
-        conferences, left_on="id", right_on="paper_id"
-    )
-
     # Journals
-    annual_papers_in_journals = pd.DataFrame(
-        paper_journal.groupby(["year", "journal_name"])["paper_id"].count()
-    ).reset_index()
+    annual_papers_in_journals = (
+        journals["count"]
+        .groupby(level=["year", "journal_name"], observed=True)
+        .sum()
+        .rename("paper_id")
+        .reset_index()
+    )
     annual_papers_in_journals = annual_papers_in_journals.astype({"year": "int"})
 
     # Conferences
-    annual_papers_in_conferences = pd.DataFrame(
-        paper_conference.groupby(["year", "conference_name"])["paper_id"].count()
-    ).reset_index()
+    annual_papers_in_conferences = (
+        conferences["count"]
+        .groupby(level=["year", "conference_name"], observed=True)
+        .sum()
+        .rename("paper_id")
+        .reset_index()
+    )
     annual_papers_in_conferences = annual_papers_in_conferences.astype({"year": "int"})
 
+    # Keep the 25 journals and conferences with the most papers in a year
+    annual_papers_in_journals = _top_by_year(annual_papers_in_journals, 25)
+    annual_papers_in_conferences = _top_by_year(annual_papers_in_conferences, 25)
+
     # Plot
     slider = alt.binding_range(min=2000, max=2020, step=1)
     year = alt.selection_single(
         name="selected", fields=["year"], bind=slider, init={"year": 2000}
     )
 
+    journal_data, journal_path = _chart_data(
+        annual_papers_in_journals, f"{filename}_journals"
+    )
+    conference_data, conference_path = _chart_data(
+        annual_papers_in_conferences, f"{filename}_conferences"
+    )
+
     j = (
-        alt.Chart(annual_papers_in_journals)
+        alt.Chart(journal_data)
         .mark_bar()
         .encode(
-            x=alt.Y("paper_id", title="Count", scale=alt.Scale(domain=[0, 90])),
-            y=alt.X("journal_name", title="Journal name", sort="-x"),
+            x=alt.Y("paper_id:Q", title="Count", scale=alt.Scale(domain=[0, 90])),
+            y=alt.X("journal_name:N", title="Journal name", sort="-x"),
         )
         .properties(width=500, height=300, title="Publications in journals")
         .add_selection(year)
         .transform_filter(year)
-        .transform_window(
-            row_number="row_number(paper_id)",
-            sort=[alt.SortField("paper_id", order="descending")],
-        )
-        .transform_filter((alt.datum.row_number <= 25))
     )
 
     c = (
-        alt.Chart(annual_papers_in_conferences)
+        alt.Chart(conference_data)
         .mark_bar()
         .encode(
-            x=alt.Y("paper_id", title="Count", scale=alt.Scale(domain=[0, 90])),
-            y=alt.X("conference_name", title="Conference name", sort="-x"),
+            x=alt.Y("paper_id:Q", title="Count", scale=alt.Scale(domain=[0, 90])),
+            y=alt.X("conference_name:N", title="Conference name", sort="-x"),
         )
         .properties(width=500, height=300, title="Publications in conferences")
         .add_selection(year)
         .transform_filter(year)
-        .transform_window(
-            row_number="row_number(paper_id)",
-            sort=[alt.SortField("paper_id", order="descending")],
-        )
-        .transform_filter((alt.datum.row_number <= 25))
     )
 
-    alt.hconcat(j, c).save(f"{ci_mapping.project_dir}/reports/figures/{filename}.html")
+    path = output_path(filename)
+    alt.hconcat(j, c).save(path)
     logger.info(f"Stored {filename} plot.")
+    return [journal_path, conference_path, path]
+
+
+def _top_by_year(df, n):
+    """Keeps the n rows with the most papers in each year."""
+    return (
+        df.sort_values(["year", "paper_id"], ascending=[True, False])
+        .groupby("year")
+        .head(n)
+    )
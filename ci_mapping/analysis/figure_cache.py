@@ -0,0 +1,166 @@
+"""
+Fingerprint cache of the EDA figures. A figure is only rendered again if its input
+DataFrames, its parameters or its code have changed since its files were written.
+The code of a figure is the source of its module and of the modules of the
+`ci_mapping` functions it calls, such as helpers imported from other modules, so
+that module-level constants are covered too.
+
+Figures build the paths of the files they write with `output_path` and return them.
+After a figure is rendered, the fingerprint of the call is stored next to each of
+its files (`<file>.fingerprint`) and the list of files is stored in
+`reports/figures/.fingerprints/<fingerprint>.json`. The figure is skipped when all
+of these files exist and carry the fingerprint of the call.
+"""
+import json
+import hashlib
+import inspect
+import functools
+import pandas as pd
+from pathlib import Path
+import ci_mapping
+from ci_mapping import logger
+from ci_mapping.data.artifacts import FrameRef
+
+
+def figure_dir():
+    """Directory of the figures.
+
+    Returns:
+        (`pathlib.Path`)
+
+    """
+    return Path(f"{ci_mapping.project_dir}/reports/figures")
+
+
+def output_path(name, extension="html"):
+    """Builds the path of a file written by a figure.
+
+    Args:
+        name (str): Name of the file, relative to the figures directory.
+        extension (str): File extension.
+
+    Returns:
+        (str)
+
+    """
+    return str(figure_dir() / f"{name}.{extension}")
+
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(str(value.dtypes.to_dict()).encode())
+        try:
+            hashes = pd.util.hash_pandas_object(value, index=True)
+        except TypeError:
+            # Columns of lists or other unhashable objects
+            hashes = pd.util.hash_pandas_object(value.astype(str), index=True)
+        digest.update(hashes.values.tobytes())
+    elif isinstance(value, FrameRef):
+        digest.update(value.fingerprint.encode())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def _names(code):
+    """Global names used by a code object and by the functions and comprehensions
+    nested in it."""
+    yield from code.co_names
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            yield from _names(const)
+
+
+def _modules(func, seen):
+    """Modules of a function and of the `ci_mapping` functions it calls."""
+    if func in seen:
+        return
+    seen.add(func)
+    yield inspect.getmodule(func)
+    for name in _names(func.__code__):
+        obj = func.__globals__.get(name)
+        if inspect.isfunction(obj) and (
+            obj.__module__ == func.__module__
+            or obj.__module__.split(".")[0] == "ci_mapping"
+        ):
+            yield from _modules(inspect.unwrap(obj), seen)
+
+
+def figure_fingerprint(figure, args, kwargs):
+    """Hashes a figure call.
+
+    Args:
+        figure (function): Figure function.
+        args (list): Positional arguments of the call.
+        kwargs (dict): Keyword arguments of the call.
+
+    Returns:
+        (str): SHA-256 hex digest of the arguments, including the default ones, and
+            of the source of the modules of the figure.
+
+    """
+    call = inspect.signature(figure).bind(*args, **kwargs)
+    call.apply_defaults()
+
+    digest = hashlib.sha256()
+    modules = {module.__name__: module for module in _modules(figure, set())}
+    for name in sorted(modules):
+        digest.update(inspect.getsource(modules[name]).encode())
+    for name, value in call.arguments.items():
+        digest.update(name.encode())
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+def _fresh_outputs(fingerprint):
+    """Files written by a figure call with this fingerprint, or None if any of them
+    is missing or has been written by another call."""
+    manifest = figure_dir() / ".fingerprints" / f"{fingerprint}.json"
+    if not manifest.exists():
+        return None
+
+    outputs = json.loads(manifest.read_text())
+    for path in outputs:
+        sidecar = Path(f"{path}.fingerprint")
+        if not (
+            Path(path).exists()
+            and sidecar.exists()
+            and sidecar.read_text() == fingerprint
+        ):
+            return None
+    return outputs
+
+
+def cached_figure(figure):
+    """Skips a figure if it has already been rendered with the same inputs.
+
+    Args:
+        figure (function): Figure function. It must build the paths of the files
+            it writes with `output_path` and return them.
+
+    Returns:
+        (function): Figure function returning the paths of its files, whether they
+            were written by this call or by an earlier one.
+
+    """
+
+    @functools.wraps(figure)
+    def wrapper(*args, **kwargs):
+        fingerprint = figure_fingerprint(figure, args, kwargs)
+        outputs = _fresh_outputs(fingerprint)
+        if outputs is not None:
+            logger.info(f"Skipped {figure.__name__}, its inputs have not changed.")
+            return outputs
+
+        outputs = list(figure(*args, **kwargs) or [])
+
+        # Figures that did not write anything are not cached
+        if outputs:
+            for path in outputs:
+                Path(f"{path}.fingerprint").write_text(fingerprint)
+            manifest_dir = figure_dir() / ".fingerprints"
+            manifest_dir.mkdir(parents=True, exist_ok=True)
+            (manifest_dir / f"{fingerprint}.json").write_text(json.dumps(outputs))
+
+        return outputs
+
+    return wrapper
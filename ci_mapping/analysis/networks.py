@@ -0,0 +1,130 @@
+"""
+Networks of the CI research landscape. Edges are read from sparse co-occurrence
+counts (see `ci_mapping.utils.cooccurrence`) and added to the graph in bulk.
+
+Collaboration networks of authors and affiliations can have millions of edges, so
+they are kept as sparse CSR adjacency matrices with the ID of each node instead of
+`networkx` graphs.
+"""
+import numpy as np
+import pandas as pd
+import networkx as nx
+from pathlib import Path
+from scipy import sparse
+from ci_mapping.utils.cooccurrence import cooccurrence, incidence_matrix
+
+
+def frequent_fields_of_study(pfos, thresholds):
+    """Finds the Fields of Study used by more papers than the threshold of their
+    level.
+
+    Args:
+        pfos (`pd.DataFrame`): Paper-FoS pairs with the `name` and `level` of the
+            FoS.
+        thresholds (dict): Minimum frequency of the FoS of each level. FoS of the
+            levels that are not in it are dropped.
+
+    Returns:
+        (set): Names of the frequent FoS.
+
+    """
+    frequency = pfos.field_of_study_id.value_counts().rename("frequency")
+    fos = pfos.drop_duplicates("field_of_study_id").join(
+        frequency, on="field_of_study_id"
+    )
+    return set(fos[fos.frequency > fos.level.map(thresholds)].name)
+
+
+def fos_cooccurrence_network(pfos, thresholds, edge_threshold):
+    """Creates a co-occurrence network of the frequent Fields of Study.
+
+    Args:
+        pfos (`pd.DataFrame`): Paper-FoS pairs with the `name` and `level` of the
+            FoS.
+        thresholds (dict): Minimum frequency of the FoS of each level, see
+            `frequent_fields_of_study`.
+        edge_threshold (int): Pairs of FoS that co-occur this many times or fewer
+            are not linked.
+
+    Returns:
+        (`networkx.Graph`): FoS linked by the number of papers they co-occur in
+            (`weight`).
+
+    """
+    top_fos = frequent_fields_of_study(pfos, thresholds)
+    pairs = cooccurrence(
+        pfos[pfos.name.isin(top_fos)], "name", min_weight=edge_threshold + 1
+    )
+
+    G = nx.Graph()
+    G.add_weighted_edges_from(
+        zip(pairs.item_a.tolist(), pairs.item_b.tolist(), pairs.weight.tolist())
+    )
+    return G
+
+
+def collaboration_network(df, node, group="paper_id"):
+    """Creates a collaboration network, where two nodes (e.g. authors) are linked
+    by the number of papers they share.
+
+    Args:
+        df (`pd.DataFrame`): One row per paper and node, e.g. paper-author pairs.
+        node (str): Column of the node IDs, e.g. `author_id` or `affiliation_id`.
+        group (str): Column of the paper IDs.
+
+    Returns:
+        adjacency (`scipy.sparse.csr_matrix`): Symmetric adjacency matrix without
+            self-loops.
+        ids (`pd.Index`): ID of the node of each row and column.
+
+    """
+    X, _, ids = incidence_matrix(df[group], df[node])
+    adjacency = (X.T @ X).tocsr()
+
+    # The diagonal holds the number of papers of each node
+    adjacency = adjacency - sparse.diags(adjacency.diagonal(), dtype=adjacency.dtype)
+    adjacency.eliminate_zeros()
+
+    return adjacency.tocsr(), ids.rename(node)
+
+
+def node_metrics(adjacency, ids):
+    """Computes the degree and strength of the nodes of a network.
+
+    Args:
+        adjacency (`scipy.sparse.csr_matrix`): Symmetric adjacency matrix.
+        ids (`pd.Index`): ID of the node of each row.
+
+    Returns:
+        (`pd.DataFrame`): Number of neighbours (`degree`) and sum of the weights of
+            the edges (`strength`) of each node, indexed by `ids`.
+
+    """
+    return pd.DataFrame(
+        {
+            "degree": np.diff(adjacency.indptr),
+            "strength": np.asarray(adjacency.sum(axis=1)).ravel(),
+        },
+        index=ids,
+    )
+
+
+def save_network(adjacency, ids, name, directory):
+    """Writes a network to `<directory>/<name>.npz` (adjacency matrix) and
+    `<directory>/<name>_nodes.parquet` (node IDs and metrics, in the order of the
+    rows of the matrix).
+
+    Args:
+        adjacency (`scipy.sparse.csr_matrix`): Adjacency matrix.
+        ids (`pd.Index`): ID of the node of each row.
+        name (str): Name of the network.
+        directory (str): Directory of the files. It is created if it does not
+            exist.
+
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    sparse.save_npz(directory / f"{name}.npz", adjacency)
+    node_metrics(adjacency, ids).reset_index().to_parquet(
+        directory / f"{name}_nodes.parquet"
+    )
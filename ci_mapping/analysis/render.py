@@ -0,0 +1,127 @@
+"""
+Parallel rendering of the EDA figures. The figures do not depend on each other, so
+each one is rendered in a separate process.
+
+The DataFrames passed to the figures are written once to uncompressed Arrow
+(Feather) files that the workers memory-map, instead of being pickled to every
+worker. Arguments that are already stored on disk as `FrameRef` are passed as is and
+loaded by the workers.
+"""
+import os
+import shutil
+import logging
+import tempfile
+import pandas as pd
+import pyarrow.feather as feather
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ci_mapping.data.artifacts import FrameRef
+
+
+class SpilledFrame:
+    """DataFrame stored in an Arrow file.
+
+    Args:
+        path (str): Path to the Feather file.
+        index (:obj:`list` of str): Columns to restore as the index.
+
+    """
+
+    def __init__(self, path, index=[]):
+        self.path = path
+        self.index = index
+
+    @classmethod
+    def spill(cls, df, path):
+        """Writes a DataFrame to an uncompressed Feather file. Named indices are
+        stored as columns, unnamed ones are dropped.
+
+        Args:
+            df (`pd.DataFrame`): Table to store.
+            path (str): Path to the Feather file.
+
+        Returns:
+            (`SpilledFrame`)
+
+        """
+        index = [name for name in df.index.names if name is not None]
+        df = df.reset_index(drop=not index)
+        feather.write_feather(df, path, compression="uncompressed")
+        return cls(path, index)
+
+    def load(self):
+        """Memory-maps the Feather file.
+
+        Returns:
+            (`pd.DataFrame`)
+
+        """
+        df = feather.read_table(self.path, memory_map=True).to_pandas()
+        return df.set_index(self.index) if self.index else df
+
+
+def _load(value):
+    return value.load() if isinstance(value, (SpilledFrame, FrameRef)) else value
+
+
+def _render(figure, args, kwargs):
+    figure(*[_load(arg) for arg in args], **{k: _load(v) for k, v in kwargs.items()})
+    return figure.__name__
+
+
+def render_figures(figures, max_workers=4, spill_dir=None):
+    """Renders figures in a process pool.
+
+    Args:
+        figures (:obj:`list` of :obj:`tuple`): Figure functions with their
+            positional and keyword arguments. `FrameRef` arguments are loaded
+            before the figure is rendered.
+        max_workers (int): Number of processes. If it is 1 or less, the figures are
+            rendered one after another in the current process.
+        spill_dir (str): Directory where the Arrow files are written. The system's
+            temporary directory is used if None.
+
+    """
+    if max_workers <= 1:
+        # Each stored DataFrame is read once, no matter how many figures use it
+        loaded = {}
+
+        def load(value):
+            if not isinstance(value, FrameRef):
+                return value
+            if value.path not in loaded:
+                loaded[value.path] = value.load()
+            return loaded[value.path]
+
+        for figure, args, kwargs in figures:
+            figure(
+                *[load(arg) for arg in args], **{k: load(v) for k, v in kwargs.items()}
+            )
+        return
+
+    directory = tempfile.mkdtemp(dir=spill_dir)
+    try:
+        # Each DataFrame is written once, no matter how many figures use it
+        spilled = {}
+
+        def spill(value):
+            if not isinstance(value, pd.DataFrame):
+                return value
+            if id(value) not in spilled:
+                path = os.path.join(directory, f"{len(spilled)}.feather")
+                spilled[id(value)] = SpilledFrame.spill(value, path)
+            return spilled[id(value)]
+
+        with ProcessPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _render,
+                    figure,
+                    [spill(arg) for arg in args],
+                    {k: spill(v) for k, v in kwargs.items()},
+                )
+                for figure, args, kwargs in figures
+            ]
+            for future in as_completed(futures):
+                logging.info(f"Rendered {future.result()}")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,145 @@
+"""
+Lightweight Metaflow artifacts. Large DataFrames are written to Parquet files and
+the flow only stores a reference to them (path and content fingerprint), instead of
+pickling and hashing the whole DataFrame after every step.
+
+A file is only hashed again on load if its size or modification time differ from
+the ones it was stored with, and at most once per process for a given state.
+
+The files are written to the local disk and only their paths are stored in the
+flow, so the steps that load them must run on the same machine, with the local
+Metaflow datastore. Remote (e.g. `--with batch`) steps cannot open them. The files
+of each run are stored in their own directory, and only the most recent runs are
+kept (see `prune_runs`).
+"""
+import os
+import shutil
+import hashlib
+import logging
+import pyarrow.parquet as pq
+from pathlib import Path
+import ci_mapping
+
+ARTIFACT_DIR = ci_mapping.project_dir / ci_mapping.config["data"]["artifact_path"]
+
+# Fingerprints of the files hashed by this process, by path, size and mtime
+_verified = {}
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """Hashes the content of a file.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Bytes read at a time.
+
+    Returns:
+        (str): SHA-256 hex digest.
+
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as h:
+        for chunk in iter(lambda: h.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FrameRef:
+    """Reference to a DataFrame stored in a Parquet file.
+
+    Args:
+        path (str): Path to the Parquet file.
+        fingerprint (str): SHA-256 hex digest of the file.
+        stat (:obj:`tuple` of int): Size and modification time (ns) of the file
+            when it was stored.
+
+    """
+
+    def __init__(self, path, fingerprint, stat=None):
+        self.path = str(path)
+        self.fingerprint = fingerprint
+        self.stat = stat
+
+    def __repr__(self):
+        return f"FrameRef({self.path!r}, {self.fingerprint[:12]!r})"
+
+    @classmethod
+    def save(cls, df, name, directory=ARTIFACT_DIR):
+        """Writes a DataFrame, including its index, to `<directory>/<name>.parquet`.
+
+        Args:
+            df (`pd.DataFrame`): Table to store.
+            name (str): Name of the file.
+            directory (str): Directory of the file. It is created if it does not
+                exist.
+
+        Returns:
+            (`FrameRef`)
+
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{name}.parquet"
+        df.to_parquet(path)
+        logging.info(f"Stored {name} in {path}")
+        return cls(path, file_fingerprint(path), _stat(path))
+
+    def load(self, columns=None):
+        """Reads the DataFrame, memory-mapping the Parquet file.
+
+        Args:
+            columns (:obj:`list` of str): Columns to read. All if None.
+
+        Returns:
+            (`pd.DataFrame`)
+
+        """
+        self._verify()
+        table = pq.read_table(
+            self.path, columns=columns, memory_map=True, use_pandas_metadata=True
+        )
+        return table.to_pandas()
+
+    def _verify(self):
+        """Checks that the file has not changed since it was stored."""
+        stat = _stat(self.path)
+        if stat == self.stat:
+            return
+
+        key = (self.path, stat)
+        if key not in _verified:
+            _verified[key] = file_fingerprint(self.path)
+        if _verified[key] != self.fingerprint:
+            raise ValueError(f"{self.path} has changed since it was stored.")
+
+
+def prune_runs(directory, keep):
+    """Deletes the artifacts of all but the most recent runs of a flow.
+
+    Args:
+        directory (str): Artifact directory of the flow, with one subdirectory per
+            run.
+        keep (int): Number of runs to keep.
+
+    Returns:
+        (:obj:`list` of str): Names of the deleted runs.
+
+    """
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+
+    runs = sorted(
+        (run for run in directory.iterdir() if run.is_dir()),
+        key=lambda run: run.stat().st_mtime_ns,
+        reverse=True,
+    )
+    for run in runs[keep:]:
+        shutil.rmtree(run)
+        logging.info(f"Deleted the artifacts of run {run.name}")
+    return [run.name for run in runs[keep:]]
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
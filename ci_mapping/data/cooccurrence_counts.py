@@ -0,0 +1,91 @@
+"""
+Persisted co-occurrence counts of Fields of Study. The pairs of FoS of every paper
+are counted once, by subset (AI_CI, CI) and year, and added to the stored counts
+with an upsert. Networks of any period can then be read from `mag_fos_cooccurrence`
+without scanning `mag_paper_fields_of_study` again.
+"""
+import pandas as pd
+from sqlalchemy.sql import exists
+from sqlalchemy.dialects.postgresql import insert
+from ci_mapping.data.mag_orm import (
+    Paper,
+    PaperFieldsOfStudy,
+    CoreControlGroup,
+    FosCooccurrence,
+    FosCooccurrencePaper,
+)
+from ci_mapping.utils.cooccurrence import cooccurrence
+
+
+def fos_pair_counts(pfos):
+    """Counts the co-occurrences of Fields of Study by subset and year.
+
+    Args:
+        pfos (`pd.DataFrame`): Paper-FoS pairs with the `type` and `year` of the
+            papers.
+
+    Returns:
+        (:obj:`list` of :obj:`dict`): Rows of `mag_fos_cooccurrence`.
+
+    """
+    pairs = cooccurrence(pfos, "field_of_study_id", by=["type", "year"])
+    return [
+        {
+            "item_a": int(row.item_a),
+            "item_b": int(row.item_b),
+            "type": row.type,
+            "year": row.year,
+            "weight": int(row.weight),
+        }
+        for row in pairs.itertuples(index=False)
+    ]
+
+
+def update_fos_cooccurrence(s, rebuild=False):
+    """Adds the co-occurrences of the Fields of Study of the tagged papers that have
+    not been counted yet to `mag_fos_cooccurrence`.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        rebuild (bool): If True, the counts are emptied and all of the tagged papers
+            are counted again. Use it when the papers have been tagged again.
+
+    Returns:
+        (int): Number of papers counted.
+
+    """
+    if rebuild:
+        s.query(FosCooccurrence).delete()
+        s.query(FosCooccurrencePaper).delete()
+
+    query = (
+        s.query(
+            PaperFieldsOfStudy.paper_id,
+            PaperFieldsOfStudy.field_of_study_id,
+            CoreControlGroup.type,
+            Paper.year,
+        )
+        .join(CoreControlGroup, CoreControlGroup.id == PaperFieldsOfStudy.paper_id)
+        .join(Paper, Paper.id == PaperFieldsOfStudy.paper_id)
+        .filter(~exists().where(FosCooccurrencePaper.id == PaperFieldsOfStudy.paper_id))
+    )
+    # Read within the session, which holds the tags that are not committed yet
+    s.flush()
+    pfos = pd.read_sql(query.statement, s.connection())
+    if pfos.empty:
+        return 0
+
+    rows = fos_pair_counts(pfos)
+    if rows:
+        statement = insert(FosCooccurrence.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["item_a", "item_b", "type", "year"],
+            set_={"weight": FosCooccurrence.weight + statement.excluded.weight},
+        )
+        s.execute(statement, rows)
+
+    paper_ids = pfos.paper_id.unique()
+    s.bulk_insert_mappings(
+        FosCooccurrencePaper, [{"id": int(id_)} for id_ in paper_ids]
+    )
+    return len(paper_ids)
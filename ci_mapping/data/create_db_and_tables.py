@@ -4,6 +4,7 @@ from sqlalchemy import create_engine, exc
 from dotenv import load_dotenv, find_dotenv
 import os
 from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.db_session import get_engine
 
 load_dotenv(find_dotenv())
 
@@ -29,9 +30,7 @@ def create_db_and_tables(db):
             logging.error(e)
             raise
 
-    db_config = os.getenv(db)
-    engine = create_engine(db_config)
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine(db))
 
 
 if __name__ == "__main__":
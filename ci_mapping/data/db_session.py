@@ -0,0 +1,87 @@
+"""
+Engine and session lifecycle for the PostgreSQL database. Engines are created once
+per process and database and shared by all sessions, so that pipeline steps reuse
+pooled connections instead of opening new ones.
+"""
+import os
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv, find_dotenv
+import ci_mapping
+
+load_dotenv(find_dotenv())
+db_config = ci_mapping.config["data"]["db"]
+
+_engines = {}
+
+
+def get_engine(db_name, **kwargs):
+    """Returns the engine of a database, creating it on first use.
+
+    Args:
+        db_name (str): Name of the environment variable holding the database URI.
+        kwargs: Engine options overriding the `data.db` section of model_config.yaml.
+
+    Returns:
+        (`sqlalchemy.engine.Engine`)
+
+    """
+    if db_name not in _engines:
+        options = {
+            "pool_size": db_config["pool_size"],
+            "max_overflow": db_config["max_overflow"],
+            "pool_pre_ping": db_config["pool_pre_ping"],
+            "pool_recycle": db_config["pool_recycle"],
+        }
+        options.update(kwargs)
+        _engines[db_name] = create_engine(os.getenv(db_name), **options)
+    return _engines[db_name]
+
+
+def dispose_engines():
+    """Closes the pooled connections of every engine created in this process."""
+    for engine in _engines.values():
+        engine.dispose()
+    _engines.clear()
+
+
+@contextmanager
+def session_scope(db_name):
+    """Provides a transactional scope around a series of operations. The session
+    is committed on exit, rolled back on error and always closed.
+
+    Args:
+        db_name (str): Name of the environment variable holding the database URI.
+
+    Yields:
+        (`sqlalchemy.orm.session.Session`)
+
+    """
+    session = sessionmaker(bind=get_engine(db_name))()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def stream(query, batch_size=db_config["yield_per"]):
+    """Iterates over a query with a server-side cursor, fetching rows in batches
+    instead of buffering the whole result set.
+
+    Note that the session running the query should not be committed while the
+    results are being consumed, as this would close the cursor.
+
+    Args:
+        query (`sqlalchemy.orm.query.Query`): Query to stream.
+        batch_size (int): Number of rows fetched per round-trip.
+
+    Returns:
+        (`sqlalchemy.orm.query.Query`)
+
+    """
+    return query.execution_options(stream_results=True).yield_per(batch_size)
@@ -0,0 +1,264 @@
+"""
+Local catalogue of MAG Fields of Study, shared across projects so that FoS that have
+already been resolved are not queried again.
+
+Each revision of the catalogue is stored in its own directory as flat numpy arrays
+sorted by FoS ID, which are memory-mapped on load and searched with binary search:
+
+    <path>/CURRENT              name of the active revision
+    <path>/<revision>/ids.npy   FoS IDs (int64, sorted)
+    <path>/<revision>/levels.npy
+    <path>/<revision>/names.bin, name_offsets.npy
+    <path>/<revision>/parents.npy, parent_offsets.npy
+    <path>/<revision>/children.npy, child_offsets.npy
+
+"""
+import os
+import json
+import shutil
+import logging
+import numpy as np
+from pathlib import Path
+
+FORMAT_VERSION = 1
+ARRAYS = [
+    "ids",
+    "levels",
+    "name_offsets",
+    "parents",
+    "parent_offsets",
+    "children",
+    "child_offsets",
+]
+
+
+class FosCatalogue:
+    """Memory-mapped lookup table of Fields of Study.
+
+    Args:
+        ids (`np.ndarray`): Sorted FoS IDs.
+        levels (`np.ndarray`): Level of each FoS in MAG's hierarchy.
+        names (`np.ndarray`): UTF-8 encoded FoS names, concatenated.
+        name_offsets (`np.ndarray`): Start and end of each name in `names`.
+        parents (`np.ndarray`): Parent IDs of all FoS, concatenated.
+        parent_offsets (`np.ndarray`): Start and end of each FoS' parents.
+        children (`np.ndarray`): Child IDs of all FoS, concatenated.
+        child_offsets (`np.ndarray`): Start and end of each FoS' children.
+        revision (int): Revision of the catalogue.
+
+    """
+
+    def __init__(
+        self,
+        ids,
+        levels,
+        names,
+        name_offsets,
+        parents,
+        parent_offsets,
+        children,
+        child_offsets,
+        revision=0,
+    ):
+        self.ids = ids
+        self.levels = levels
+        self.names = names
+        self.name_offsets = name_offsets
+        self.parents = parents
+        self.parent_offsets = parent_offsets
+        self.children = children
+        self.child_offsets = child_offsets
+        self.revision = revision
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records, revision=0):
+        """Builds a catalogue from FoS records.
+
+        Args:
+            records (:obj:`list` of :obj:`dict`): FoS with their `id`, `name`,
+                `level`, `parent_ids` and `child_ids`, as returned by
+                `query_fields_of_study`.
+            revision (int): Revision of the catalogue.
+
+        Returns:
+            (`FosCatalogue`)
+
+        """
+        records = sorted({r["id"]: r for r in records}.values(), key=lambda r: r["id"])
+        names = [r["name"].encode("utf-8") for r in records]
+        parents = [r.get("parent_ids", []) for r in records]
+        children = [r.get("child_ids", []) for r in records]
+
+        return cls(
+            ids=np.array([r["id"] for r in records], dtype=np.int64),
+            levels=np.array([r["level"] for r in records], dtype=np.int8),
+            names=np.frombuffer(b"".join(names), dtype=np.uint8),
+            name_offsets=_offsets(names),
+            parents=np.array(
+                [p for parent_ids in parents for p in parent_ids], dtype=np.int64
+            ),
+            parent_offsets=_offsets(parents),
+            children=np.array(
+                [c for child_ids in children for c in child_ids], dtype=np.int64
+            ),
+            child_offsets=_offsets(children),
+            revision=revision,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps the active revision of a catalogue. Returns an empty catalogue
+        if none has been saved at `path` yet.
+
+        Args:
+            path (str): Catalogue directory.
+
+        Returns:
+            (`FosCatalogue`)
+
+        """
+        path = Path(path)
+        try:
+            revision = (path / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            logging.info(f"No FoS catalogue found in {path}")
+            return cls.from_records([])
+
+        directory = path / revision
+        with open(directory / "manifest.json") as h:
+            manifest = json.load(h)
+        if manifest["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported FoS catalogue format: {manifest['format']}")
+
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAYS
+        }
+        if (directory / "names.bin").stat().st_size > 0:
+            names = np.memmap(directory / "names.bin", dtype=np.uint8, mode="r")
+        else:
+            names = np.array([], dtype=np.uint8)
+
+        return cls(names=names, revision=manifest["revision"], **arrays)
+
+    def save(self, path):
+        """Writes the catalogue as a new revision and makes it the active one.
+        The previous revision is kept so that readers holding it open are not
+        affected. If another process has already written this revision, the
+        catalogue is saved as the next free one.
+
+        Args:
+            path (str): Catalogue directory.
+
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        while True:
+            directory = path / f"r{self.revision:06d}"
+            try:
+                directory.mkdir()
+                break
+            except FileExistsError:
+                self.revision += 1
+
+        for name in ARRAYS:
+            np.save(directory / f"{name}.npy", np.asarray(getattr(self, name)))
+        np.asarray(self.names).tofile(directory / "names.bin")
+        with open(directory / "manifest.json", "w") as h:
+            json.dump(
+                {
+                    "format": FORMAT_VERSION,
+                    "revision": self.revision,
+                    "size": len(self),
+                },
+                h,
+            )
+
+        # Atomically point readers to the new revision
+        tmp = path / f"CURRENT.{directory.name}.tmp"
+        with open(tmp, "w") as h:
+            h.write(directory.name)
+        os.replace(tmp, path / "CURRENT")
+
+        for old in path.glob("r*"):
+            if old.is_dir() and old.name < f"r{self.revision - 1:06d}":
+                shutil.rmtree(old)
+
+    def records(self):
+        """Yields the FoS in the catalogue.
+
+        Returns:
+            (:obj:`generator` of :obj:`dict`)
+
+        """
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def lookup(self, ids):
+        """Finds FoS in the catalogue.
+
+        Args:
+            ids (:obj:`list` of int): FoS IDs.
+
+        Returns:
+            found (:obj:`list` of :obj:`dict`): FoS in the catalogue.
+            missing (:obj:`list` of int): IDs not in the catalogue.
+
+        """
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(self) == 0:
+            return [], ids.tolist()
+
+        positions = np.searchsorted(self.ids, ids)
+        positions = np.minimum(positions, len(self) - 1)
+        hits = np.asarray(self.ids[positions]) == ids
+
+        found = [self._record(i) for i in positions[hits]]
+        return found, ids[~hits].tolist()
+
+    def merge(self, records):
+        """Adds FoS to the catalogue, replacing the ones with the same ID.
+
+        Args:
+            records (:obj:`list` of :obj:`dict`): FoS as returned by
+                `query_fields_of_study`.
+
+        Returns:
+            (`FosCatalogue`): New revision of the catalogue.
+
+        """
+        records = list(records)
+        if not records:
+            return self
+        return FosCatalogue.from_records(
+            list(self.records()) + records, revision=self.revision + 1
+        )
+
+    def _record(self, i):
+        name = bytes(self.names[self.name_offsets[i] : self.name_offsets[i + 1]])
+        return {
+            "id": int(self.ids[i]),
+            "name": name.decode("utf-8"),
+            "level": int(self.levels[i]),
+            "parent_ids": [
+                int(p)
+                for p in self.parents[
+                    self.parent_offsets[i] : self.parent_offsets[i + 1]
+                ]
+            ],
+            "child_ids": [
+                int(c)
+                for c in self.children[
+                    self.child_offsets[i] : self.child_offsets[i + 1]
+                ]
+            ],
+        }
+
+
+def _offsets(items):
+    """Start and end positions of variable-length items stored back to back."""
+    return np.concatenate([[0], np.cumsum([len(item) for item in items])]).astype(
+        np.int64
+    )
@@ -0,0 +1,178 @@
+"""
+Offline geocoder that resolves place names against a local gazetteer file, such as
+a GRID or GeoNames dump, instead of the Google Places API.
+
+The gazetteer is a CSV file with one place per row. Its columns are mapped to the
+fields returned by `parse_response` with the `columns` argument of
+`Gazetteer.from_csv`.
+"""
+import re
+import csv
+import math
+import logging
+import numpy as np
+from collections import defaultdict
+
+# Gazetteer column for each place attribute. Missing columns are left empty.
+COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "lat": "lat",
+    "lng": "lng",
+    "postal_town": "city",
+    "administrative_area_level_1": "region",
+    "country": "country",
+    "website": "website",
+}
+
+
+def tokenize(name):
+    """Splits a lowercased name into alphanumeric tokens.
+
+    Args:
+        name (str): Name of a place.
+
+    Returns:
+        (:obj:`list` of str)
+
+    """
+    return re.findall(r"\w+", name.lower())
+
+
+class Gazetteer:
+    """Fuzzy place name matcher backed by an in-memory inverted token index.
+    Names are compared with the cosine similarity of their IDF-weighted token sets.
+
+    Args:
+        places (:obj:`list` of :obj:`dict`): Places with the keys of `COLUMNS`.
+        min_score (float): Minimum similarity of a match, between 0 and 1.
+        max_candidates (int): Tokens that appear in more places than this are
+            not used to find candidate matches, unless a name has no rarer token.
+
+    """
+
+    def __init__(self, places, min_score=0.8, max_candidates=1000):
+        self.places = places
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+
+        self._exact = {}
+        self._tokens = []
+        self._postings = defaultdict(list)
+        for i, place in enumerate(places):
+            tokens = set(tokenize(place["name"]))
+            self._exact.setdefault(" ".join(tokenize(place["name"])), i)
+            self._tokens.append(tokens)
+            for token in tokens:
+                self._postings[token].append(i)
+
+        self._idf = {
+            token: math.log(len(places) / len(postings)) + 1
+            for token, postings in self._postings.items()
+        }
+        # Tokens missing from the gazetteer weigh as much as the rarest ones
+        self._max_idf = math.log(max(len(places), 1)) + 1
+        self._norms = [self._norm(tokens) for tokens in self._tokens]
+
+    def __len__(self):
+        return len(self.places)
+
+    @classmethod
+    def from_csv(cls, path, columns=COLUMNS, **kwargs):
+        """Reads a gazetteer from a CSV file.
+
+        Args:
+            path (str): Path to the CSV file.
+            columns (dict): CSV column of each place attribute.
+            kwargs: Arguments passed to `Gazetteer`.
+
+        Returns:
+            (`Gazetteer`)
+
+        """
+        with open(path, newline="", encoding="utf-8") as h:
+            places = [
+                {attr: row.get(column) or None for attr, column in columns.items()}
+                for row in csv.DictReader(h)
+            ]
+        logging.info(f"Read {len(places)} places from {path}")
+        return cls(places, **kwargs)
+
+    def match(self, name):
+        """Finds the place that best matches a name.
+
+        Args:
+            name (str): Name of the place.
+
+        Returns:
+            (:obj:`tuple`): Index of the place in `places` and the similarity score,
+                or None if no place scored at least `min_score`.
+
+        """
+        tokens = set(tokenize(name))
+        key = " ".join(tokenize(name))
+        if key in self._exact:
+            return self._exact[key], 1.0
+
+        known = sorted((t for t in tokens if t in self._postings), key=self._df)
+        if not known:
+            return None
+        selective = [t for t in known if self._df(t) <= self.max_candidates]
+        candidates = {i for t in selective or known[:1] for i in self._postings[t]}
+
+        norm = self._norm(tokens)
+        best, best_score = None, 0
+        for i in candidates:
+            shared = sum(self._idf[t] ** 2 for t in tokens & self._tokens[i])
+            score = shared / (norm * self._norms[i])
+            if score > best_score:
+                best, best_score = i, score
+
+        if best_score < self.min_score:
+            return None
+        return best, best_score
+
+    def geocode(self, name):
+        """Geocodes a place name.
+
+        Args:
+            name (str): Name of the place.
+
+        Returns:
+            (dict): Geocoded information with the same keys as `parse_response`, or
+                None if no place matched.
+
+        """
+        match = self.match(name)
+        if match is None:
+            return None
+
+        place = self.places[match[0]]
+        d = {
+            "lat": float(place["lat"]) if place["lat"] is not None else np.nan,
+            "lng": float(place["lng"]) if place["lng"] is not None else np.nan,
+            "address": ", ".join(
+                place[attr]
+                for attr in ["postal_town", "administrative_area_level_1", "country"]
+                if place[attr] is not None
+            ),
+            "name": place["name"],
+            "id": place["id"],
+            "types": np.nan,
+            "administrative_area_level_2": np.nan,
+        }
+        for attr in [
+            "website",
+            "postal_town",
+            "administrative_area_level_1",
+            "country",
+        ]:
+            d[attr] = place[attr] if place[attr] is not None else np.nan
+
+        return d
+
+    def _df(self, token):
+        return len(self._postings[token])
+
+    def _norm(self, tokens):
+        return math.sqrt(sum(self._idf.get(t, self._max_idf) ** 2 for t in tokens)) or 1
@@ -1,11 +1,19 @@
+import time
 import logging
+import threading
 import requests
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ci_mapping.data.geocode_cache import MISSING
 
 FIND_PLACE = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json?"
 PLACE_DETAILS = "https://maps.googleapis.com/maps/api/place/details/json?"
 
 
+class PlacesApiError(Exception):
+    """The Google Places API refused or failed to answer a request."""
+
+
 def place_by_name(place, key, FIND_PLACE=FIND_PLACE):
     """Finds a Google Place ID by searching with its name.
 
@@ -17,7 +25,11 @@ def place_by_name(place, key, FIND_PLACE=FIND_PLACE):
             service must be enabled in order to use it.
 
     Returns:
-        (str) Place ID.
+        (str) Place ID or None if the API found no match (`ZERO_RESULTS`).
+
+    Raises:
+        PlacesApiError: If the API answered with any other status and no
+            candidates, e.g. `OVER_QUERY_LIMIT` or `REQUEST_DENIED`.
     
     """
     params = {
@@ -30,12 +42,18 @@ def place_by_name(place, key, FIND_PLACE=FIND_PLACE):
     r = requests.get(FIND_PLACE, params=params)
     r.raise_for_status()
 
-    try:
-        return r.json()["candidates"][0]["place_id"]
-    except IndexError as e:
+    response = r.json()
+    if response.get("status") == "ZERO_RESULTS":
         logging.info(f"Failed to find a match for {place}")
         return None
 
+    try:
+        return response["candidates"][0]["place_id"]
+    except (IndexError, KeyError):
+        raise PlacesApiError(
+            f"{response.get('status')}: {response.get('error_message', '')}"
+        )
+
 
 def place_by_id(id, key, PLACE_DETAILS=PLACE_DETAILS):
     """Finds details about a place given its Google Place ID.
@@ -114,6 +132,137 @@ def parse_response(response):
     return d
 
 
+def location_row(affiliation_id, details):
+    """Builds the `geocoded_places` row of a geocoded affiliation.
+
+    Args:
+        affiliation_id (int): ID of the affiliation.
+        details (dict): Place details, see `parse_response`.
+
+    Returns:
+        (dict): The place details and the ID of the affiliation.
+
+    """
+    return dict(details, affiliation_id=affiliation_id)
+
+
+class RateLimiter:
+    """Spaces out calls shared by many threads so that no more than `qps` calls
+    start in a second.
+
+    Args:
+        qps (float): Maximum number of calls per second. No limit if None.
+
+    """
+
+    def __init__(self, qps=None):
+        self.interval = 1 / qps if qps else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def geocode_place(name, key, limiter=None, cache=None, gazetteer=None):
+    """Finds a place by its name and fetches its details.
+
+    When a local geocoder (such as a `Gazetteer`) is given, it is tried first and
+    the Google Places API is only used as a fallback for its misses, if a key is
+    provided. When a cache is given, the API is only called for names and Place IDs
+    that are not in it, and names without a match (`ZERO_RESULTS`) are cached too.
+    Failed requests, including throttled or denied ones, are not cached.
+
+    Args:
+        name (str): Name of the place.
+        key (str): Key for the Google API. If None, only the local geocoder is used.
+        limiter (`RateLimiter`): Rate limit shared with other workers.
+        cache (`GeocodeCache`): Persistent geocoding cache.
+        gazetteer: Local geocoder with a `geocode(name)` method returning place
+            details in the format of `parse_response` or None.
+
+    Returns:
+        (dict): Parsed place details (see `parse_response`) or None if no match
+            was found or the requests failed.
+
+    """
+    if gazetteer is not None:
+        details = gazetteer.geocode(name)
+        if details is not None or key is None:
+            return details
+
+    limiter = limiter or RateLimiter()
+    try:
+        place_id = cache.get_place_id(name) if cache is not None else MISSING
+        if place_id is MISSING:
+            limiter.wait()
+            place_id = place_by_name(name, key)
+            if cache is not None:
+                cache.set_place_id(name, place_id)
+        if place_id is None:
+            return None
+
+        details = cache.get_details(place_id) if cache is not None else None
+        if details is None:
+            limiter.wait()
+            details = parse_response(place_by_id(place_id, key))
+            if cache is not None:
+                cache.set_details(place_id, details)
+        return details
+    except (requests.exceptions.RequestException, PlacesApiError) as e:
+        logging.error(f"Failed to geocode {name}: {e}")
+        return None
+
+
+def geocode_places(places, key, max_workers=8, qps=10, cache=None, gazetteer=None):
+    """Geocodes places concurrently with a pool of threads, pipelining the
+    find-place and place-details requests of many places under a shared rate limit.
+
+    Args:
+        places (:obj:`iterable` of :obj:`tuple`): (ID, name) pairs. It is consumed
+            lazily, keeping at most `2 * max_workers` places in flight.
+        key (str): Key for the Google API.
+        max_workers (int): Number of concurrent workers.
+        qps (float): Maximum number of requests per second across all workers.
+        cache (`GeocodeCache`): Persistent geocoding cache.
+        gazetteer: Local geocoder tried before the API, see `geocode_place`.
+
+    Yields:
+        (:obj:`tuple`): (ID, place details) pairs in completion order. Place details
+            are None if the place could not be geocoded.
+
+    """
+    limiter = RateLimiter(qps)
+    places = iter(places)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < 2 * max_workers:
+                try:
+                    id, name = next(places)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(
+                    geocode_place, name, key, limiter, cache, gazetteer
+                )
+                in_flight[future] = id
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+
+
 if __name__ == "__main__":
     import os
     from dotenv import load_dotenv, find_dotenv
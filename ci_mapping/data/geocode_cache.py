@@ -0,0 +1,151 @@
+"""
+Persistent cache of Google Places responses, stored in a local SQLite file so that
+it can be shared across runs and projects. It maps normalised place names to
+Google Place IDs and Place IDs to parsed place details. Names that could not be
+matched are cached as well, with a shorter time-to-live.
+"""
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+# Returned by `GeocodeCache.get_place_id` for names that are not in the cache.
+MISSING = object()
+
+
+def normalise_name(name):
+    """Lowercases a place name and collapses whitespace.
+
+    Args:
+        name (str): Name of the place.
+
+    Returns:
+        (str)
+
+    """
+    return " ".join(name.lower().split())
+
+
+class GeocodeCache:
+    """SQLite-backed geocoding cache. It can be shared by many threads.
+
+    Args:
+        path (str): Path to the SQLite file. It is created if it does not exist.
+        ttl_days (float): Days after which cached places expire.
+        negative_ttl_days (float): Days after which cached misses expire.
+
+    """
+
+    def __init__(self, path, ttl_days=365, negative_ttl_days=30):
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS names "
+                "(name TEXT PRIMARY KEY, place_id TEXT, created REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS places "
+                "(place_id TEXT PRIMARY KEY, details TEXT, created REAL)"
+            )
+
+    def get_place_id(self, name):
+        """Finds the Place ID of a place name.
+
+        Args:
+            name (str): Name of the place.
+
+        Returns:
+            (str): Place ID, None if the name is cached as not matching any place or
+                `MISSING` if it is not in the cache.
+
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT place_id, created FROM names WHERE name = ?",
+                (normalise_name(name),),
+            ).fetchone()
+        if row is None:
+            return MISSING
+
+        place_id, created = row
+        ttl = self.ttl if place_id is not None else self.negative_ttl
+        if time.time() - created > ttl:
+            return MISSING
+        return place_id
+
+    def set_place_id(self, name, place_id):
+        """Caches the Place ID of a place name.
+
+        Args:
+            name (str): Name of the place.
+            place_id (str): Place ID or None if the name did not match any place.
+
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO names VALUES (?, ?, ?)",
+                (normalise_name(name), place_id, time.time()),
+            )
+
+    def get_details(self, place_id):
+        """Finds the details of a place.
+
+        Args:
+            place_id (str): Place ID.
+
+        Returns:
+            (dict): Place details as returned by `parse_response` or None if they
+                are not in the cache.
+
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT details, created FROM places WHERE place_id = ?", (place_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def set_details(self, place_id, details):
+        """Caches the details of a place.
+
+        Args:
+            place_id (str): Place ID.
+            details (dict): Place details as returned by `parse_response`.
+
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places VALUES (?, ?, ?)",
+                (place_id, json.dumps(details), time.time()),
+            )
+
+    def evict(self):
+        """Deletes expired entries.
+
+        Returns:
+            (int): Number of deleted entries.
+
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM names WHERE "
+                "(place_id IS NOT NULL AND created < ?) "
+                "OR (place_id IS NULL AND created < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            ).rowcount
+            deleted += self._conn.execute(
+                "DELETE FROM places WHERE created < ?", (now - self.ttl,)
+            ).rowcount
+        return deleted
+
+    def close(self):
+        """Closes the connection to the SQLite file."""
+        self._conn.close()
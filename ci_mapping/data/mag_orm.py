@@ -2,7 +2,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import TEXT, VARCHAR, TSVECTOR
 from sqlalchemy import Column, ForeignKey
 from sqlalchemy.orm import relationship
-from sqlalchemy.types import Integer, Date, Boolean, Float, BIGINT
+from sqlalchemy.types import Integer, Date, DateTime, Boolean, Float, BIGINT
 
 Base = declarative_base()
 
@@ -171,6 +171,26 @@ class FosMetadata(Base):
     level = Column(Integer)
 
 
+class FosHierarchy(Base):
+    """Parent-child links between Fields of Study in MAG's hierarchy."""
+
+    __tablename__ = "mag_field_of_study_hierarchy"
+
+    parent_id = Column(BIGINT, primary_key=True, autoincrement=False)
+    child_id = Column(BIGINT, primary_key=True, autoincrement=False)
+
+
+class FosClosure(Base):
+    """Transitive closure of the Field of Study hierarchy. Every FoS is its own
+    ancestor at depth 0."""
+
+    __tablename__ = "mag_field_of_study_closure"
+
+    ancestor_id = Column(BIGINT, primary_key=True, autoincrement=False)
+    descendant_id = Column(BIGINT, primary_key=True, autoincrement=False, index=True)
+    depth = Column(Integer)
+
+
 class CoreControlGroup(Base):
     """Shows the subset (AI, AI/CI, CI) of a paper."""
 
@@ -181,6 +201,40 @@ class CoreControlGroup(Base):
     type = Column(TEXT)
 
 
+class FosCooccurrence(Base):
+    """Number of papers of a subset (AI_CI, CI) and year in which two Fields of
+    Study co-occur. `item_a` is always lower than `item_b`."""
+
+    __tablename__ = "mag_fos_cooccurrence"
+
+    item_a = Column(BIGINT, primary_key=True, autoincrement=False)
+    item_b = Column(BIGINT, primary_key=True, autoincrement=False)
+    type = Column(TEXT, primary_key=True)
+    year = Column(TEXT, primary_key=True)
+    weight = Column(Integer)
+
+
+class FosCooccurrencePaper(Base):
+    """Papers counted in the Field of Study co-occurrences."""
+
+    __tablename__ = "mag_fos_cooccurrence_papers"
+    id = Column(
+        BIGINT, ForeignKey("mag_papers.id"), primary_key=True, autoincrement=False
+    )
+
+
+class PaperCitationMetrics(Base):
+    """Citations of a paper by the other papers of the database and its PageRank in
+    their citation graph."""
+
+    __tablename__ = "mag_paper_citation_metrics"
+    id = Column(
+        BIGINT, ForeignKey("mag_papers.id"), primary_key=True, autoincrement=False
+    )
+    in_corpus_citations = Column(Integer)
+    pagerank = Column(Float)
+
+
 class OpenAccess(Base):
     """Flags open access journals."""
 
@@ -201,6 +255,25 @@ class AffiliationType(Base):
     type = Column(Integer)
 
 
+class TagFingerprint(Base):
+    """Fingerprint of the seed list and rules used to fill a tag table."""
+
+    __tablename__ = "tag_fingerprints"
+
+    table_name = Column(TEXT, primary_key=True)
+    fingerprint = Column(VARCHAR(64))
+
+
+class TableLoad(Base):
+    """Last pipeline run that wrote to a table."""
+
+    __tablename__ = "table_loads"
+
+    table_name = Column(TEXT, primary_key=True)
+    run_id = Column(TEXT)
+    updated = Column(DateTime)
+
+
 if __name__ == "__main__":
     import os
     import logging
@@ -184,3 +184,23 @@ def parse_affiliations(response, paper_id):
                 }
             )
     return affiliations, paper_author_aff
+
+
+def parse_fos_hierarchy(response):
+    """Parse the parent-child links of a field of study from a MAG API response, as
+    returned by `query_fields_of_study`.
+
+    Args:
+        response (dict): Field of study with its `parent_ids` and `child_ids`.
+
+    Returns:
+        (:obj:`list` of :obj:`dict`): Matching parent and child FoS IDs.
+
+    """
+    return [
+        {"parent_id": parent_id, "child_id": response["id"]}
+        for parent_id in response.get("parent_ids", [])
+    ] + [
+        {"parent_id": response["id"], "child_id": child_id}
+        for child_id in response.get("child_ids", [])
+    ]
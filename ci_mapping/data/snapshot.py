@@ -0,0 +1,158 @@
+"""
+Parquet snapshots of PostgreSQL tables. Each snapshot is stored with the fingerprint
+of the table it was exported from (row count, maximum primary key and last pipeline
+run that wrote to it) and is read instead of the table while the fingerprint holds.
+
+Reads of a subset of the columns only select these columns from PostgreSQL and are
+stored in their own snapshot, keyed by the projection. A fresh snapshot of the
+whole table also serves them.
+
+The snapshots of each database are stored in their own directory and carry the
+location of the database in their fingerprint, so that flows run against several
+databases from the same checkout do not read each other's snapshots.
+"""
+import json
+import hashlib
+import logging
+import datetime
+import pandas as pd
+from pathlib import Path
+from sqlalchemy import func
+import ci_mapping
+from ci_mapping.data.mag_orm import TableLoad
+
+SNAPSHOT_DIR = ci_mapping.project_dir / ci_mapping.config["data"]["snapshot_path"]
+
+
+def mark_loaded(s, orms, run_id):
+    """Records that a pipeline run wrote to some tables, invalidating their
+    snapshots.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        orms (:obj:`list` of `sqlalchemy.ext.declarative.api.DeclarativeMeta`):
+            Tables written by the run.
+        run_id (str): ID of the pipeline run.
+
+    """
+    for orm in orms:
+        s.merge(
+            TableLoad(
+                table_name=orm.__tablename__,
+                run_id=str(run_id),
+                updated=datetime.datetime.now(datetime.timezone.utc),
+            )
+        )
+
+
+def last_loaded(s, orm):
+    """Finds when a pipeline run last wrote to a table.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        orm (`sqlalchemy.ext.declarative.api.DeclarativeMeta`): Table.
+
+    Returns:
+        (`datetime.datetime`): Time of the last write or None if no run has been
+            recorded.
+
+    """
+    load = (
+        s.query(TableLoad.updated)
+        .filter_by(table_name=orm.__tablename__)
+        .one_or_none()
+    )
+    return load[0] if load is not None else None
+
+
+def table_fingerprint(s, orm):
+    """Summarises the state of a table.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        orm (`sqlalchemy.ext.declarative.api.DeclarativeMeta`): Table.
+
+    Returns:
+        (dict): Row count, maximum value of the first primary key column and the
+            last run that wrote to the table.
+
+    """
+    key = list(orm.__table__.primary_key.columns)[0]
+    rows, max_key = s.query(func.count(key), func.max(key)).one()
+    load = (
+        s.query(TableLoad.run_id, TableLoad.updated)
+        .filter_by(table_name=orm.__tablename__)
+        .one_or_none()
+    )
+    return {
+        "table": orm.__tablename__,
+        "rows": rows,
+        "max_key": max_key,
+        "load": list(load) if load is not None else None,
+    }
+
+
+def read_table(s, orm, columns=None, snapshot_dir=SNAPSHOT_DIR):
+    """Reads a table from its Parquet snapshot if the table has not changed since
+    the snapshot was taken, otherwise from PostgreSQL, refreshing the snapshot.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        orm (`sqlalchemy.ext.declarative.api.DeclarativeMeta`): Table.
+        columns (:obj:`list` of str): Columns to select. All if None.
+        snapshot_dir (str): Directory of the snapshots. The snapshots of each
+            database are stored in a subdirectory named after it.
+
+    Returns:
+        (`pd.DataFrame`)
+
+    """
+    url = s.get_bind().url
+    database = f"{url.drivername}://{url.host or ''}:{url.port or ''}/{url.database}"
+    snapshot_dir = Path(snapshot_dir) / Path(url.database or "default").stem
+    table = dict(table_fingerprint(s, orm), database=database)
+
+    # A snapshot of the projection or of the whole table can be used
+    for projection in [columns, None] if columns is not None else [None]:
+        path, fingerprint_path, fingerprint = _snapshot(
+            snapshot_dir, orm, projection, table
+        )
+        if (
+            path.exists()
+            and fingerprint_path.exists()
+            and fingerprint_path.read_text() == fingerprint
+        ):
+            logging.info(f"Reading {orm.__tablename__} from snapshot.")
+            return pd.read_parquet(path, columns=columns)
+
+    path, fingerprint_path, fingerprint = _snapshot(snapshot_dir, orm, columns, table)
+    if columns is None:
+        query = s.query(orm)
+    else:
+        query = s.query(*[getattr(orm, column) for column in columns])
+    df = pd.read_sql(query.statement, s.bind)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, index=False)
+    fingerprint_path.write_text(fingerprint)
+    logging.info(f"Stored snapshot of {orm.__tablename__}.")
+
+    return df
+
+
+def _snapshot(snapshot_dir, orm, columns, table):
+    """Paths and fingerprint of the snapshot of a projection of a table."""
+    name = orm.__tablename__
+    if columns is not None:
+        projection = ",".join(sorted(columns)).encode("utf-8")
+        name = f"{name}.{hashlib.sha256(projection).hexdigest()[:16]}"
+
+    fingerprint = json.dumps(
+        dict(table, columns=sorted(columns) if columns is not None else None),
+        sort_keys=True,
+        default=str,
+    )
+    return (
+        snapshot_dir / f"{name}.parquet",
+        snapshot_dir / f"{name}.json",
+        fingerprint,
+    )
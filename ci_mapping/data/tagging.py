@@ -0,0 +1,102 @@
+"""
+Set-based tagging of papers, run inside PostgreSQL instead of row by row in Python.
+
+Tag tables are filled incrementally. A fingerprint of the seed list and rules used
+to fill each table is stored in `tag_fingerprints`, and a table is only emptied and
+rebuilt when its fingerprint changes.
+"""
+import json
+import hashlib
+from sqlalchemy import insert, literal
+from sqlalchemy.sql import exists
+from ci_mapping.data.mag_orm import (
+    FieldOfStudy,
+    PaperFieldsOfStudy,
+    CoreControlGroup,
+    TagFingerprint,
+)
+
+# Bump when the tagging logic changes in a way that invalidates existing tags.
+TAG_LOGIC_VERSION = 1
+
+
+def seed_fingerprint(seeds, rule):
+    """Hashes a seed list together with the rule applied to it.
+
+    Args:
+        seeds (:obj:`list` of str): Seed list. Its order does not matter.
+        rule (str): Name of the rule that uses the seed list to tag.
+
+    Returns:
+        (str): SHA-256 hex digest.
+
+    """
+    payload = json.dumps(
+        {"seeds": sorted(set(seeds)), "rule": rule, "version": TAG_LOGIC_VERSION}
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prepare_tag_table(s, orm, fingerprint):
+    """Empties a tag table if the fingerprint of its rules has changed since it
+    was filled and records the new fingerprint.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        orm (`sqlalchemy.ext.declarative.api.DeclarativeMeta`): Tag table.
+        fingerprint (str): Fingerprint of the current rules, see `seed_fingerprint`.
+
+    Returns:
+        (bool): True if the table was emptied and must be rebuilt, False if only
+            untagged rows need tagging.
+
+    """
+    stored = (
+        s.query(TagFingerprint).filter_by(table_name=orm.__tablename__).one_or_none()
+    )
+    if stored is not None and stored.fingerprint == fingerprint:
+        return False
+
+    s.query(orm).delete()
+    s.merge(TagFingerprint(table_name=orm.__tablename__, fingerprint=fingerprint))
+    return True
+
+
+def tag_core_control_group(s, fos_subset, tag="CI", fos_subset_tag="AI_CI"):
+    """Tags papers by the Fields of Study they are annotated with. This is the
+    set-based equivalent of `allocate_in_group`: papers with at least one FoS in
+    `fos_subset` are tagged as `fos_subset_tag` and the rest as `tag`.
+
+    The tags are written with two INSERT ... SELECT statements, leaving papers that
+    are already in `core_control_group` untouched.
+
+    Args:
+        s (`sqlalchemy.orm.session.Session`): PostgreSQL connection.
+        fos_subset (:obj:`list` of str): Normalised names of the subset FoS.
+        tag (str): Tag of the papers outside the subset.
+        fos_subset_tag (str): Tag of the papers in the subset.
+
+    Returns:
+        (dict): Number of papers inserted per tag.
+
+    """
+    subset_ids = s.query(FieldOfStudy.id).filter(FieldOfStudy.norm_name.in_(fos_subset))
+    untagged = ~exists().where(CoreControlGroup.id == PaperFieldsOfStudy.paper_id)
+
+    counts = {}
+    for tag_, condition in [
+        (fos_subset_tag, PaperFieldsOfStudy.field_of_study_id.in_(subset_ids)),
+        (tag, None),
+    ]:
+        query = s.query(PaperFieldsOfStudy.paper_id, literal(tag_)).filter(untagged)
+        if condition is not None:
+            query = query.filter(condition)
+
+        r = s.execute(
+            insert(CoreControlGroup.__table__).from_select(
+                ["id", "type"], query.distinct().statement
+            )
+        )
+        counts[tag_] = r.rowcount
+
+    return counts
@@ -2,27 +2,41 @@
 For bugs/issues, contact the Nesta team or myself at k.stathou@gmail.com.
 """
 
-from metaflow import FlowSpec, step, Parameter
-import pandas as pd
+from metaflow import FlowSpec, step, Parameter, current
 from sqlalchemy.sql import exists
-from sqlalchemy import create_engine, and_
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_
 from dotenv import load_dotenv, find_dotenv
-import glob
 import toolz
+import json
+import numpy as np
+import networkx as nx
 import pickle
 import os
 import ci_mapping
 from ci_mapping import logger
 from ci_mapping.data.create_db_and_tables import create_db_and_tables
+from ci_mapping.data.db_session import session_scope, stream
+from ci_mapping.data.tagging import (
+    tag_core_control_group,
+    seed_fingerprint,
+    prepare_tag_table,
+)
+from ci_mapping.data.cooccurrence_counts import update_fos_cooccurrence
+from ci_mapping.data.fos_catalogue import FosCatalogue
+from ci_mapping.data.snapshot import read_table, mark_loaded, last_loaded
+from ci_mapping.data.artifacts import FrameRef, ARTIFACT_DIR, prune_runs
 from ci_mapping.data.query_mag import (
     query_mag_api,
     query_fields_of_study,
     build_composite_expr,
 )
-from ci_mapping.data.geocode import place_by_id, place_by_name, parse_response
+from ci_mapping.data.geocode import geocode_places, location_row
+from ci_mapping.data.geocode_cache import GeocodeCache
+from ci_mapping.data.gazetteer import Gazetteer
 from ci_mapping.utils.utils import unique_dicts, unique_dicts_by_value, flatten_lists
-from ci_mapping.utils.utils import date_range, str2datetime, allocate_in_group
+from ci_mapping.utils.utils import date_range, str2datetime, transitive_closure
+from ci_mapping.utils.utils import shard_windows, select_key
+from ci_mapping.utils.taggers import build_tagger
 from ci_mapping.data.parse_mag_data import (
     parse_affiliations,
     parse_authors,
@@ -30,6 +44,7 @@ from ci_mapping.data.parse_mag_data import (
     parse_journal,
     parse_papers,
     parse_conference,
+    parse_fos_hierarchy,
 )
 from ci_mapping.data.mag_orm import (
     Paper,
@@ -42,7 +57,12 @@ from ci_mapping.data.mag_orm import (
     Conference,
     AuthorAffiliation,
     FosMetadata,
+    FosHierarchy,
+    FosClosure,
     CoreControlGroup,
+    FosCooccurrence,
+    FosCooccurrencePaper,
+    PaperCitationMetrics,
     AffiliationLocation,
     AffiliationType,
     OpenAccess,
@@ -62,11 +82,28 @@ from ci_mapping.analysis.data_cleaning import (
     clean_data,
     clean_author_affiliations,
 )
+from ci_mapping.analysis.cube import analysis_cube
+from ci_mapping.analysis.collaboration import paper_collaborations
+from ci_mapping.analysis.render import render_figures
+from ci_mapping.analysis.networks import (
+    fos_cooccurrence_network,
+    collaboration_network,
+    save_network,
+)
+from ci_mapping.analysis.citations import (
+    citation_matrix,
+    in_corpus_citations,
+    pagerank,
+    cocitations,
+)
 
 load_dotenv(find_dotenv())
 config = ci_mapping.config["data"]
+db_config = ci_mapping.config["data"]["db"]
+geocode_config = ci_mapping.config["data"]["geocode"]
 mag_config = ci_mapping.config["data"]["mag"]
 plot_config = ci_mapping.config["plots"]
+network_config = ci_mapping.config["network"]
 
 
 class CollectiveIntelligenceFlow(FlowSpec):
@@ -77,17 +114,25 @@ class CollectiveIntelligenceFlow(FlowSpec):
         1. Create a PostgreSQL database and the required tables as shown in the ER diagram.
             If they already exist, the initialisation is skipped.
         2. Collect papers from MAG based on Fields of Study (FoS).
-            The pickled responses are stored locally in data/raw/.
+            The collection period is split into shards of date windows that are
+            collected in parallel. The pickled responses are stored locally in
+            data/raw/.
         3. Parse the MAG API response in a PostgreSQL database.
-        4. Collect the level of a Field of Study in MAG's hierarchy.
+        4. Collect the level of a Field of Study in MAG's hierarchy, its parent-child
+            links and their transitive closure.
         5. Tag papers as CI and AI+CI. This method could be modified to divide a
             dataset to core and control groups.
         6. Geocode author affiliation using Google Places API.
         7. Tag journals as open access based on a seed list.
         8. Find the type (industry, non-industry) of affiliations based on a seed list.
+            Steps 4 to 8 only depend on the parsed MAG data and run in parallel.
         9. Process the data used in EDA. This involves changing data types, merging and
             grouping tables.
         10. Exploratory data analysis of the CI research landscape.
+        11. Create the co-occurrence network of the frequent Fields of Study of CI and
+            AI+CI papers.
+        12. Create the collaboration networks of authors and affiliations.
+        13. Compute the in-corpus citations, PageRank and co-citations of the papers.
 
     """
 
@@ -120,9 +165,14 @@ class CollectiveIntelligenceFlow(FlowSpec):
     )
     subscription_key = Parameter(
         "subscription_key",
-        help="MAG API key stored in the .env file.",
+        help="MAG API keys stored in the .env file, separated by commas.",
         default=os.getenv("mag_key"),
     )
+    mag_shards = Parameter(
+        "mag_shards",
+        help="Number of parallel collection tasks, each with a share of the windows.",
+        default=mag_config["shards"],
+    )
     google_api_key = Parameter(
         "google_api_key", help="Google API Key", default=os.getenv("google_key")
     )
@@ -134,10 +184,10 @@ class CollectiveIntelligenceFlow(FlowSpec):
         help="Path to store MAG response files.",
         default=mag_config["store_path"],
     )
-    external_data = Parameter(
-        "external_data",
-        help="Path to external data.",
-        default=f'{ci_mapping.project_dir}/{config["external_path"]}',
+    fos_catalogue = Parameter(
+        "fos_catalogue",
+        help="Path to the local catalogue of Fields of Study.",
+        default=f'{ci_mapping.project_dir}/{config["fos_catalogue"]}',
     )
     fos_subset = Parameter(
         "fos_subset",
@@ -179,41 +229,39 @@ class CollectiveIntelligenceFlow(FlowSpec):
         help="Merge FoS based on a given mapping.",
         default=plot_config["fos_mapping"],
     )
-
-    def _create_session(self):
-        """Creates a PostgreSQL session."""
-        # Connect to postgresql
-        db_config = os.getenv(self.db_name)
-        engine = create_engine(db_config)
-        Session = sessionmaker(bind=engine)
-        return Session()
-
-    def _is_open_access(self, name):
-        """Tag papers as open access based on a seed list."""
-        if name in set(self.oa_journals):
-            return 1
-        else:
-            return 0
-
-    def _find_non_industry_affiliations(self, name):
-        """Tag affiliations as non-industry based on a seed list."""
-        if any(val in name for val in self.non_industry):
-            return 1
-        else:
-            return 0
+    eda_workers = Parameter(
+        "eda_workers",
+        help="Number of processes rendering the figures.",
+        default=plot_config["workers"],
+    )
+    fos_thresholds = Parameter(
+        "fos_thresholds",
+        help="Minimum frequency of the FoS of each level in the co-occurrence network.",
+        default=network_config["fos_thresholds"],
+    )
+    edge_threshold = Parameter(
+        "edge_threshold",
+        help="Minimum co-occurrence of two FoS linked in the network.",
+        default=network_config["edge_threshold"],
+    )
+    pagerank_damping = Parameter(
+        "pagerank_damping",
+        help="Probability of following a citation in PageRank.",
+        default=network_config["pagerank_damping"],
+    )
+    min_cocitations = Parameter(
+        "min_cocitations",
+        help="Minimum number of papers citing two papers together.",
+        default=network_config["min_cocitations"],
+    )
 
     @step
     def start(self):
-        """Creates the PostgreSQL database and tables if they do not exist."""
+        """Creates the PostgreSQL database and tables if they do not exist and splits
+        the collection period into shards of date windows.
+        """
         create_db_and_tables(self.db_name)
 
-        # Proceed to next task
-        # self.next(self.data_wrangling)
-        self.next(self.collect_mag)
-
-    @step
-    def collect_mag(self):
-        """Collect papers from MAG and store the response locally as a pickle."""
         # Convert strings to datetime objects
         mag_start_date = str2datetime(self.mag_start_date)
         mag_end_date = str2datetime(self.mag_end_date)
@@ -223,26 +271,44 @@ class CollectiveIntelligenceFlow(FlowSpec):
             abs(mag_start_date.year - mag_end_date.year) + 1
         ) * self.intervals_in_a_year
 
+        windows = list(
+            toolz.sliding_window(
+                2, list(date_range(mag_start_date, mag_end_date, total_intervals))
+            )
+        )
+        self.shards = shard_windows(windows, self.mag_shards)
+        logger.info(f"Collecting {len(windows)} windows in {len(self.shards)} shards.")
+
+        # Proceed to next task
+        self.next(self.collect_mag, foreach="shards")
+
+    @step
+    def collect_mag(self):
+        """Collect papers from MAG for a shard of date windows and store the
+        responses locally as pickles. Shards are distributed across the
+        subscription keys.
+        """
+        shard = self.index
+        subscription_key = select_key(self.subscription_key, shard)
+
+        self.manifest = []
         i = 0
         query_count = 1000
-        for date in toolz.sliding_window(
-            2, list(date_range(mag_start_date, mag_end_date, total_intervals))
-        ):
-            logger.info(f"Date interval: {date}")
+        for date in self.input:
+            logger.info(f"Shard {shard} - Date interval: {date}")
             expression = build_composite_expr(self.query_values, self.entity_name, date)
             logger.info(f"{expression}")
 
             has_content = True
-            # i = 1
             offset = 0
             # Request the API as long as we receive non-empty responses
             while has_content:
-                logger.info(f"Query {i} - Offset {offset}...")
+                logger.info(f"Shard {shard} - Query {i} - Offset {offset}...")
 
                 data = query_mag_api(
                     expression,
                     self.metadata,
-                    self.subscription_key,
+                    subscription_key,
                     query_count=query_count,
                     offset=offset,
                 )
@@ -255,11 +321,13 @@ class CollectiveIntelligenceFlow(FlowSpec):
                 else:
                     results = [ents for ents in data["entities"]]
 
-                # Store results
-                with open(
-                    f"{ci_mapping.project_dir}/{self.store_path}_{i}.pickle", "wb"
-                ) as h:
+                # Store results in the shard's segment of the raw store
+                path = f"{ci_mapping.project_dir}/{self.store_path}_{shard}_{i}.pickle"
+                with open(path, "wb") as h:
                     pickle.dump(results, h)
+                self.manifest.append(
+                    {"path": path, "window": list(date), "results": len(results)}
+                )
                 logger.info(f"Number of stored results from query {i}: {len(results)}")
 
                 i += 1
@@ -268,25 +336,38 @@ class CollectiveIntelligenceFlow(FlowSpec):
                 if len(results) == 0:
                     has_content = False
 
+        self.next(self.merge_collections)
+
+    @step
+    def merge_collections(self, inputs):
+        """Merges the manifests of the collection shards."""
+        self.manifest = sorted(
+            (entry for inp in inputs for entry in inp.manifest),
+            key=lambda entry: entry["path"],
+        )
+        logger.info(
+            f"Collected {sum(entry['results'] for entry in self.manifest)} papers "
+            f"in {len(self.manifest)} files."
+        )
+        self.merge_artifacts(inputs, exclude=["manifest"])
+
         self.next(self.parse_mag)
 
     @step
     def parse_mag(self):
         """Parse MAG responses to PostgreSQL."""
-        # Connect to postgresql
-        s = self._create_session()
-
-        # Read MAG responses
+        # Read the MAG responses listed in the collection manifest
         data = []
-        for filename in glob.iglob("".join([self.external_data, "*.pickle"])):
-            with open(filename, "rb") as h:
+        for entry in self.manifest:
+            with open(entry["path"], "rb") as h:
                 data.extend(pickle.load(h))
 
         # Collect IDs from tables to ensure we're not inserting duplicates
-        paper_ids = {id_[0] for id_ in s.query(Paper.id)}
-        author_ids = {id_[0] for id_ in s.query(Author.id)}
-        fos_ids = {id_[0] for id_ in s.query(FieldOfStudy.id)}
-        aff_ids = {id_[0] for id_ in s.query(Affiliation.id)}
+        with session_scope(self.db_name) as s:
+            paper_ids = {id_[0] for id_ in stream(s.query(Paper.id))}
+            author_ids = {id_[0] for id_ in stream(s.query(Author.id))}
+            fos_ids = {id_[0] for id_ in stream(s.query(FieldOfStudy.id))}
+            aff_ids = {id_[0] for id_ in stream(s.query(Affiliation.id))}
 
         # Remove duplicates and keep only papers that are not already in the mag_papers table.
         data = [
@@ -354,230 +435,473 @@ class CollectiveIntelligenceFlow(FlowSpec):
         logger.info("Parsing completed!")
 
         # Insert dicts into postgresql
-        s.bulk_insert_mappings(Paper, papers)
-        s.bulk_insert_mappings(Journal, journals)
-        s.bulk_insert_mappings(Conference, conferences)
-        s.bulk_insert_mappings(Author, authors)
-        s.bulk_insert_mappings(PaperAuthor, paper_with_authors)
-        s.bulk_insert_mappings(FieldOfStudy, fields_of_study)
-        s.bulk_insert_mappings(PaperFieldsOfStudy, paper_with_fos)
-        s.bulk_insert_mappings(Affiliation, affiliations)
-        s.bulk_insert_mappings(AuthorAffiliation, paper_author_aff)
-        s.commit()
+        with session_scope(self.db_name) as s:
+            s.bulk_insert_mappings(Paper, papers)
+            s.bulk_insert_mappings(Journal, journals)
+            s.bulk_insert_mappings(Conference, conferences)
+            s.bulk_insert_mappings(Author, authors)
+            s.bulk_insert_mappings(PaperAuthor, paper_with_authors)
+            s.bulk_insert_mappings(FieldOfStudy, fields_of_study)
+            s.bulk_insert_mappings(PaperFieldsOfStudy, paper_with_fos)
+            s.bulk_insert_mappings(Affiliation, affiliations)
+            s.bulk_insert_mappings(AuthorAffiliation, paper_author_aff)
+            if data:
+                mark_loaded(
+                    s,
+                    [
+                        Paper,
+                        Journal,
+                        Conference,
+                        Author,
+                        PaperAuthor,
+                        FieldOfStudy,
+                        PaperFieldsOfStudy,
+                        Affiliation,
+                        AuthorAffiliation,
+                    ],
+                    current.run_id,
+                )
         logger.info("Committed to DB!")
 
-        self.next(self.collect_fields_of_study_level)
+        # The enrichment steps write to separate tables, so they run in parallel
+        self.next(
+            self.collect_fields_of_study_level,
+            self.fos_groups,
+            self.geocode_affiliation,
+            self.open_access_journals,
+            self.affiliation_type,
+        )
 
     @step
     def collect_fields_of_study_level(self):
         """Collect Fields' of Study metadata."""
-        # Connect to postgresql
-        s = self._create_session()
-
-        # Keep the FoS IDs that haven't been collected yet
-        fields_of_study_ids = [
-            id_[0]
-            for id_ in s.query(FieldOfStudy.id).filter(
+        # Read and write with separate sessions so that commits do not close
+        # the server-side cursor.
+        with session_scope(self.db_name) as read, session_scope(
+            self.db_name
+        ) as write:
+            # Keep the FoS IDs that haven't been collected yet
+            query = read.query(FieldOfStudy.id).filter(
                 ~exists().where(FieldOfStudy.id == FosMetadata.id)
             )
-        ]
-        logger.info(f"Fields of study left: {len(fields_of_study_ids)}")
-
-        # Collect FoS metadata
-        fos = query_fields_of_study(self.subscription_key, ids=fields_of_study_ids)
+            logger.info(f"Fields of study left: {query.count()}")
+
+            # Look FoS up in the local catalogue and query MAG only for the misses
+            catalogue = FosCatalogue.load(self.fos_catalogue)
+            fos, missing = catalogue.lookup(id_[0] for id_ in stream(query))
+            logger.info(f"Fields of study found in catalogue: {len(fos)}")
+
+            if missing:
+                fetched = list(
+                    query_fields_of_study(
+                        select_key(self.subscription_key), ids=missing
+                    )
+                )
+                catalogue.merge(fetched).save(self.fos_catalogue)
+                fos.extend(fetched)
 
-        # Parse api response
-        for response in fos:
-            s.add(FosMetadata(id=response["id"], level=response["level"]))
-            s.commit()
+            # Parse api response
+            hierarchy = {
+                tuple(edge)
+                for edge in write.query(FosHierarchy.parent_id, FosHierarchy.child_id)
+            }
+            n_edges = len(hierarchy)
+            for batch in toolz.partition_all(db_config["yield_per"], fos):
+                write.bulk_insert_mappings(
+                    FosMetadata,
+                    [
+                        {"id": response["id"], "level": response["level"]}
+                        for response in batch
+                    ],
+                )
+                edges = {
+                    (edge["parent_id"], edge["child_id"])
+                    for response in batch
+                    for edge in parse_fos_hierarchy(response)
+                } - hierarchy
+                write.bulk_insert_mappings(
+                    FosHierarchy,
+                    [{"parent_id": p, "child_id": c} for p, c in edges],
+                )
+                hierarchy.update(edges)
+                write.commit()
+
+            if fos:
+                mark_loaded(write, [FosMetadata], current.run_id)
+            if len(hierarchy) > n_edges:
+                mark_loaded(write, [FosHierarchy], current.run_id)
+            logger.info(f"FoS hierarchy edges: {len(hierarchy)}")
+
+            # Rebuild the transitive closure of the FoS hierarchy only if the
+            # hierarchy has changed since the closure was last built
+            hierarchy_loaded = last_loaded(write, FosHierarchy)
+            closure_loaded = last_loaded(write, FosClosure)
+            if hierarchy_loaded is not None and (
+                closure_loaded is None or closure_loaded < hierarchy_loaded
+            ):
+                write.query(FosClosure).delete()
+                write.bulk_insert_mappings(
+                    FosClosure,
+                    [
+                        {
+                            "ancestor_id": ancestor,
+                            "descendant_id": child,
+                            "depth": depth,
+                        }
+                        for ancestor, child, depth in transitive_closure(hierarchy)
+                    ],
+                )
+                mark_loaded(write, [FosClosure], current.run_id)
+                logger.info("Rebuilt the transitive closure of the FoS hierarchy.")
 
-        self.next(self.fos_groups)
+        self.next(self.data_wrangling)
 
     @step
     def fos_groups(self):
         """Tag Fields of Study as Core Collective Intelligence and AI+CI.
         This method could be extended to divide a dataset to core and control
-        group.
+        group. The FoS co-occurrences of the newly tagged papers are added to
+        `mag_fos_cooccurrence`.
         """
-        # Connect to postgresql
-        s = self._create_session()
-        # Delete rows in CoreControlGroup
-        s.query(CoreControlGroup).delete()
-        s.commit()
-
-        # Fetch postgres tables
-        fos = pd.read_sql(s.query(FieldOfStudy).statement, s.bind)
-        pfos = pd.read_sql(s.query(PaperFieldsOfStudy).statement, s.bind)
-
-        # Merge and groupby so that FoS are in a list
-        pfos = pfos.merge(fos, left_on="field_of_study_id", right_on="id")
-        pfos = pd.DataFrame(pfos.groupby("paper_id")["norm_name"].apply(list))
-
-        # Allocate papers in CI, AI+CI groups based on Fields of Study.
-        pfos["type"] = pfos.norm_name.apply(allocate_in_group, args=([self.fos_subset]))
-        logger.info(f"CI papers: {pfos[pfos['type']=='CI'].shape[0]}")
-        logger.info(f"AI+CI papers: {pfos[pfos['type']=='AI_CI'].shape[0]}")
+        with session_scope(self.db_name) as s:
+            # Rebuild CoreControlGroup only if the FoS subset has changed
+            fingerprint = seed_fingerprint(self.fos_subset, "fos_subset:AI_CI/CI")
+            rebuild = prepare_tag_table(s, CoreControlGroup, fingerprint)
+            if rebuild:
+                logger.info("FoS subset changed, re-tagging all papers.")
+
+            # Allocate papers in CI, AI+CI groups based on Fields of Study.
+            counts = tag_core_control_group(s, self.fos_subset)
+            if rebuild or sum(counts.values()) > 0:
+                mark_loaded(s, [CoreControlGroup], current.run_id)
+            logger.info(f"CI papers: {counts['CI']}")
+            logger.info(f"AI+CI papers: {counts['AI_CI']}")
+
+            # Add the FoS co-occurrences of the newly tagged papers
+            n_papers = update_fos_cooccurrence(s, rebuild=rebuild)
+            if rebuild or n_papers:
+                mark_loaded(s, [FosCooccurrence, FosCooccurrencePaper], current.run_id)
+            logger.info(f"Papers added to the FoS co-occurrences: {n_papers}")
 
-        for idx, row in pfos.iterrows():
-            s.add(CoreControlGroup(id=idx, type=row["type"]))
-            s.commit()
-
-        # self.next(self.open_access_journals)
-        self.next(self.geocode_affiliation)
+        self.next(self.data_wrangling)
 
     @step
     def geocode_affiliation(self):
-        """Geocode author affiliation using Google Places API."""
-        # Connect to postgresql
-        s = self._create_session()
+        """Geocode author affiliation using a local gazetteer, if one is configured,
+        and the Google Places API."""
+        with session_scope(self.db_name) as read, session_scope(
+            self.db_name
+        ) as write:
+            # Fetch affiliations that have not been geocoded yet.
+            queries = read.query(Affiliation.id, Affiliation.affiliation).filter(
+                ~exists().where(Affiliation.id == AffiliationLocation.affiliation_id)
+            )
+            logger.info(f"Number of places need geocoding: {queries.count()}")
 
-        # Fetch affiliations that have not been geocoded yet.
-        queries = s.query(Affiliation.id, Affiliation.affiliation).filter(
-            ~exists().where(Affiliation.id == AffiliationLocation.affiliation_id)
-        )
-        logger.info(f"Number of places need geocoding: {queries.count()}")
-
-        for id, name in queries:
-            r = place_by_name(name, self.google_api_key)
-            if r is not None:
-                response = place_by_id(r, self.google_api_key)
-                place_details = parse_response(response)
-                place_details.update({"affiliation_id": id})
-                s.add(AffiliationLocation(**place_details))
-                s.commit()
-            else:
-                continue
-        self.next(self.open_access_journals)
-        # self.next(self.end)
+            gazetteer = None
+            if geocode_config["gazetteer_path"]:
+                gazetteer = Gazetteer.from_csv(
+                    f'{ci_mapping.project_dir}/{geocode_config["gazetteer_path"]}',
+                    min_score=geocode_config["gazetteer_min_score"],
+                )
+            cache = GeocodeCache(
+                geocode_config["cache_path"],
+                ttl_days=geocode_config["cache_ttl_days"],
+                negative_ttl_days=geocode_config["negative_ttl_days"],
+            )
+            places = geocode_places(
+                stream(queries),
+                self.google_api_key,
+                max_workers=geocode_config["max_workers"],
+                qps=geocode_config["qps"],
+                cache=cache,
+                gazetteer=gazetteer,
+            )
+            for batch in toolz.partition_all(geocode_config["batch_size"], places):
+                locations = [
+                    location_row(id, place_details)
+                    for id, place_details in batch
+                    if place_details is not None
+                ]
+                write.bulk_insert_mappings(AffiliationLocation, locations)
+                if locations:
+                    mark_loaded(write, [AffiliationLocation], current.run_id)
+                write.commit()
+
+        logger.info(f"Evicted {cache.evict()} expired geocoding cache entries.")
+        cache.close()
+
+        self.next(self.data_wrangling)
 
     @step
     def open_access_journals(self):
         """Tag journals as open access based on a seed list."""
-        # Connect to postgresql
-        s = self._create_session()
-        # Delete rows in OpenAccess
-        s.query(OpenAccess).delete()
-        s.commit()
-
-        # Get journal names and IDs
-        journal_access = [
-            {"id": id, "open_access": self._is_open_access(journal_name)}
-            for (id, journal_name) in s.query(Journal.id, Journal.journal_name)
-            .distinct()
-            .all()
-        ]
+        with session_scope(self.db_name) as s:
+            # Rebuild OpenAccess only if the seed list has changed
+            fingerprint = seed_fingerprint(self.oa_journals, "exact")
+            rebuild = prepare_tag_table(s, OpenAccess, fingerprint)
+            if rebuild:
+                logger.info("Open access seed list changed, re-tagging all journals.")
+
+            # Get names and IDs of the journals that have not been tagged yet
+            journals = (
+                s.query(Journal.id, Journal.journal_name)
+                .filter(~exists().where(Journal.id == OpenAccess.id))
+                .distinct()
+                .all()
+            )
+            tagger = build_tagger(self.oa_journals, match="exact")
+            journal_access = [
+                {"id": id, "open_access": open_access}
+                for (id, _), open_access in zip(
+                    journals, tagger.tag_many([name for _, name in journals])
+                )
+            ]
 
-        logger.info(f"{len(journal_access)}")
+            logger.info(f"{len(journal_access)}")
 
-        # Store journal types
-        s.bulk_insert_mappings(OpenAccess, journal_access)
-        s.commit()
+            # Store journal types
+            s.bulk_insert_mappings(OpenAccess, journal_access)
+            if rebuild or journal_access:
+                mark_loaded(s, [OpenAccess], current.run_id)
 
-        self.next(self.affiliation_type)
+        self.next(self.data_wrangling)
 
     @step
     def affiliation_type(self):
         """Find the type (industry, non-industry) of an
         affiliation based on a seed list.
         """
-        # Connect to postgresql
-        s = self._create_session()
-        # Delete rows in AffiliationType
-        s.query(AffiliationType).delete()
-        s.commit()
-
-        logger.info(self.non_industry)
-        # Get affiliation names and IDs
-        aff_types = [
-            {
-                "id": aff.id,
-                "type": self._find_non_industry_affiliations(aff.affiliation),
-            }
-            for aff in s.query(Affiliation)
-            .filter(and_(~exists().where(Affiliation.id == AffiliationType.id)))
-            .all()
-        ]
-        logger.info(f"Mapped {len(aff_types)} affiliations.")
+        with session_scope(self.db_name) as read, session_scope(
+            self.db_name
+        ) as write:
+            # Rebuild AffiliationType only if the seed list has changed
+            fingerprint = seed_fingerprint(self.non_industry, "substring")
+            if prepare_tag_table(write, AffiliationType, fingerprint):
+                logger.info("Non-industry seed list changed, re-tagging affiliations.")
+                mark_loaded(write, [AffiliationType], current.run_id)
+            write.commit()
+
+            logger.info(self.non_industry)
+            # Get affiliation names and IDs
+            affiliations = read.query(Affiliation.id, Affiliation.affiliation).filter(
+                and_(~exists().where(Affiliation.id == AffiliationType.id))
+            )
 
-        # Store affiliation types
-        s.bulk_insert_mappings(AffiliationType, aff_types)
-        s.commit()
+            # Store affiliation types
+            tagger = build_tagger(self.non_industry, match="substring")
+            mapped = 0
+            for batch in toolz.partition_all(
+                db_config["yield_per"], stream(affiliations)
+            ):
+                write.bulk_insert_mappings(
+                    AffiliationType,
+                    [
+                        {"id": id, "type": type_}
+                        for (id, _), type_ in zip(
+                            batch, tagger.tag_many([name for _, name in batch])
+                        )
+                    ],
+                )
+                mark_loaded(write, [AffiliationType], current.run_id)
+                write.commit()
+                mapped += len(batch)
+        logger.info(f"Mapped {mapped} affiliations.")
 
         self.next(self.data_wrangling)
 
     @step
-    def data_wrangling(self):
-        """Cleaning data for exploratory data analysis."""
-        # Connect to postgresql
-        s = self._create_session()
-
-        # Read geocoded affiliations
-        self.aff_location = pd.read_sql(s.query(AffiliationLocation).statement, s.bind)
-        self.aff_location = self.aff_location.dropna(subset=["country"])
-        # Read journals, open access flag and conferences
-        self.journals = pd.read_sql(s.query(Journal).statement, s.bind)
-        self.open_access = pd.read_sql(s.query(OpenAccess).statement, s.bind)
-        self.conferences = pd.read_sql(s.query(Conference).statement, s.bind)
-        # Read Fields of Study and their metadata (level in hierarchy)
-        pfos = pd.read_sql(s.query(PaperFieldsOfStudy).statement, s.bind)
-        fos = pd.read_sql(s.query(FieldOfStudy).statement, s.bind)
-        self.pfos = pfos.merge(fos, left_on="field_of_study_id", right_on="id")[
-            ["paper_id", "field_of_study_id", "name"]
-        ]
-        # That's very hacky, sorry :(
-        self.pfos["name"] = [
-            self.fos_mapping[n] if n in self.fos_mapping.keys() else n
-            for n in self.pfos.name
-        ]
-        self.fos_metadata = pd.read_sql(s.query(FosMetadata).statement, s.bind)
-
-        # Data wrangling
-        self.data = clean_data(s)
-        self.aff_papers, self.paper_author_aff = clean_author_affiliations(s, self.data)
+    def data_wrangling(self, inputs):
+        """Joins the enrichment branches and cleans the data for exploratory data
+        analysis. Tables are read from their Parquet snapshots in data/interim if
+        they have not changed since the last run. The cleaned tables are stored as
+        local Parquet files and passed to `eda` as `FrameRef` artifacts, so both
+        steps must run on the same machine.
+        """
+        self.merge_artifacts(inputs)
+
+        with session_scope(self.db_name) as s:
+            # Read geocoded affiliations
+            aff_location = read_table(s, AffiliationLocation)
+            aff_location = aff_location.dropna(subset=["country"])
+            # Read journals, open access flag and conferences
+            journals = read_table(s, Journal)
+            open_access = read_table(s, OpenAccess)
+            conferences = read_table(s, Conference)
+            # Read Fields of Study and their metadata (level in hierarchy)
+            pfos = read_table(s, PaperFieldsOfStudy)
+            fos = read_table(s, FieldOfStudy)
+            pfos = pfos.merge(fos, left_on="field_of_study_id", right_on="id")[
+                ["paper_id", "field_of_study_id", "name"]
+            ]
+            # That's very hacky, sorry :(
+            pfos["name"] = [
+                self.fos_mapping[n] if n in self.fos_mapping.keys() else n
+                for n in pfos.name
+            ]
+            fos_metadata = read_table(s, FosMetadata)
+
+            # Data wrangling
+            data = clean_data(s)
+            aff_papers, paper_author_aff = clean_author_affiliations(s, data)
+
+        # Aggregates shared by the figures
+        self.cube = analysis_cube(data, aff_papers, journals, open_access, conferences)
+        collaborations = paper_collaborations(paper_author_aff, aff_location)
+
+        # Store the tables used by the figures outside of Metaflow's datastore
+        artifact_dir = ARTIFACT_DIR / current.flow_name / str(current.run_id)
+        self.data = FrameRef.save(data, "data", artifact_dir)
+        self.pfos = FrameRef.save(pfos, "pfos", artifact_dir)
+        self.fos_metadata = FrameRef.save(fos_metadata, "fos_metadata", artifact_dir)
+        self.collaborations = FrameRef.save(
+            collaborations, "collaborations", artifact_dir
+        )
+        prune_runs(artifact_dir.parent, keep=config["artifact_keep_runs"])
 
         self.next(self.eda)
 
     @step
     def eda(self):
-        """Exploratory data analysis of the CI research landscape."""
-        # Figure 1: Annual publication increase (base year: 2000)
-        annual_publication_increase(self.data)
-        # Figure 2: Annual sum of citations
-        annual_citation_sum(self.data)
-        # Figure 3: Publications by industry and non-industry affiliations
-        publications_by_affiliation_type(self.aff_papers)
-        # Figure 4: International collaborations: % of cross-country teams in CI, AI+CI
-        international_collaborations(self.paper_author_aff, self.aff_location)
-        # Figure 5: Industry - academia collaborations: % in CI, AI+CI
-        industry_non_industry_collaborations(self.paper_author_aff)
-        # Figure 6: Adoption of open access by CI, AI+CI
-        open_access_publications(self.data, self.journals, self.open_access)
-        # Figure 7: Field of study comparison for CI, AI+CI.
-        annual_fields_of_study_usage(
-            self.data,
-            self.pfos,
-            self.fos_metadata,
-            self.fos_levels,
-            top_n=self.top_n,
-            preselected_fos=[],
-            excluded_fos=self.excluded_fos
-            # preselected_fos=self.preselected_fos,
+        """Exploratory data analysis of the CI research landscape. The figures are
+        rendered in parallel by `eda_workers` processes, which load the tables
+        stored by `data_wrangling` themselves.
+        """
+        figures = [
+            # Figure 1: Annual publication increase (base year: 2000)
+            (annual_publication_increase, [self.cube["papers"]], {}),
+            # Figure 2: Annual sum of citations
+            (annual_citation_sum, [self.cube["papers"]], {}),
+            # Figure 3: Publications by industry and non-industry affiliations
+            (publications_by_affiliation_type, [self.cube["affiliation_type"]], {}),
+            # Figure 4: International collaborations: % of cross-country teams
+            (international_collaborations, [self.collaborations], {}),
+            # Figure 5: Industry - academia collaborations: % in CI, AI+CI
+            (industry_non_industry_collaborations, [self.collaborations], {}),
+            # Figure 6: Adoption of open access by CI, AI+CI
+            (open_access_publications, [self.cube["open_access"]], {}),
+            # Figure 7: Field of study comparison for CI, AI+CI.
+            (
+                annual_fields_of_study_usage,
+                [self.data, self.pfos, self.fos_metadata, self.fos_levels],
+                {
+                    "top_n": self.top_n,
+                    "preselected_fos": [],
+                    "excluded_fos": self.excluded_fos,
+                },
+            ),
+            (
+                annual_fields_of_study_usage,
+                [self.data, self.pfos, self.fos_metadata, self.fos_levels],
+                {
+                    "top_n": self.top_n,
+                    "excluded_fos": self.excluded_fos,
+                    "preselected_fos": self.preselected_fos,
+                },
+            ),
+            # Figure 8: Annual publications in conferences and journals.
+            (
+                papers_in_journals_and_conferences,
+                [self.cube["journals"], self.cube["conferences"], self.top_n],
+                {},
+            ),
+            # Figure 9: Annual publication count
+            (annual_publication_count, [self.cube["papers"]], {}),
+        ]
+        render_figures(figures, max_workers=self.eda_workers)
+
+        self.next(self.fos_network)
+
+    @step
+    def fos_network(self):
+        """Creates the co-occurrence network of the frequent Fields of Study of CI
+        and AI+CI papers and stores it as GraphML in data/interim.
+        """
+        data = self.data.load(columns=["id", "type"])
+        ci_paper_ids = data[data.type.isin(["CI", "AI_CI"])].id
+        pfos = self.pfos.load()
+        pfos = pfos[pfos.paper_id.isin(ci_paper_ids)].merge(
+            self.fos_metadata.load(), left_on="field_of_study_id", right_on="id"
         )
-        annual_fields_of_study_usage(
-            self.data,
-            self.pfos,
-            self.fos_metadata,
-            self.fos_levels,
-            top_n=self.top_n,
-            excluded_fos=self.excluded_fos,
-            preselected_fos=self.preselected_fos,
+
+        # Levels are read as strings when the thresholds are passed as JSON
+        thresholds = {int(k): v for k, v in self.fos_thresholds.items()}
+        G = fos_cooccurrence_network(pfos, thresholds, self.edge_threshold)
+        logger.info(f"FoS network: {len(G)} nodes, {len(G.edges)} edges")
+
+        nx.write_graphml(
+            G, path=f"{ci_mapping.project_dir}/{network_config['graphml_path']}"
         )
-        # Figure 8: Annual publications in conferences and journals.
-        papers_in_journals_and_conferences(
-            self.data, self.journals, self.conferences, self.top_n
+
+        self.next(self.collaboration_networks)
+
+    @step
+    def collaboration_networks(self):
+        """Creates the co-authorship networks of authors and affiliations and stores
+        their sparse adjacency matrices and node metrics in data/interim.
+        """
+        with session_scope(self.db_name) as s:
+            paper_authors = read_table(
+                s, PaperAuthor, columns=["paper_id", "author_id"]
+            )
+            paper_affiliations = read_table(
+                s, AuthorAffiliation, columns=["paper_id", "affiliation_id"]
+            )
+
+        directory = ci_mapping.project_dir / network_config["collaboration_path"]
+        for name, df, node in [
+            ("authors", paper_authors, "author_id"),
+            ("affiliations", paper_affiliations, "affiliation_id"),
+        ]:
+            adjacency, ids = collaboration_network(df, node)
+            save_network(adjacency, ids, name, directory)
+            logger.info(
+                f"{name.capitalize()} network: {len(ids)} nodes, "
+                f"{adjacency.nnz // 2} edges"
+            )
+
+        self.next(self.citation_analytics)
+
+    @step
+    def citation_analytics(self):
+        """Computes the citations of each paper by the other papers of the database
+        and its PageRank, and stores them in `mag_paper_citation_metrics`. The pairs
+        of papers that are often cited together are stored in data/interim.
+        """
+        with session_scope(self.db_name) as s:
+            papers = read_table(s, Paper, columns=["id", "references"])
+            papers["references"] = [
+                json.loads(x) if isinstance(x, str) else np.nan
+                for x in papers.references
+            ]
+
+            C, ids = citation_matrix(papers)
+            logger.info(f"Citation graph: {len(ids)} papers, {C.nnz} citations")
+
+            # PageRank depends on the whole graph, so the table is rebuilt
+            s.query(PaperCitationMetrics).delete()
+            s.bulk_insert_mappings(
+                PaperCitationMetrics,
+                [
+                    {
+                        "id": int(id_),
+                        "in_corpus_citations": int(citations),
+                        "pagerank": float(rank),
+                    }
+                    for id_, citations, rank in zip(
+                        ids,
+                        in_corpus_citations(C),
+                        pagerank(C, damping=self.pagerank_damping),
+                    )
+                ],
+            )
+            mark_loaded(s, [PaperCitationMetrics], current.run_id)
+
+        pairs = cocitations(C, ids, min_cocitations=self.min_cocitations)
+        pairs.to_parquet(
+            f"{ci_mapping.project_dir}/{network_config['cocitation_path']}"
         )
-        # Figure 9: Annual publication count
-        annual_publication_count(self.data)
+        logger.info(f"Pairs of co-cited papers: {len(pairs)}")
 
         self.next(self.end)
 
@@ -0,0 +1,100 @@
+"""
+Sparse co-occurrence counts. Records (e.g. paper-FoS, paper-country or
+paper-affiliation pairs) are turned into a sparse group × item incidence matrix `X`
+and the co-occurrences of every pair of items are read from `XᵀX`, instead of
+building every pairwise combination of each group.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def incidence_matrix(groups, items, binary=True):
+    """Builds a sparse group × item incidence matrix. Records with a missing group or
+    item are ignored.
+
+    Args:
+        groups (array-like): Group (e.g. paper ID) of each record.
+        items (array-like): Item (e.g. FoS name) of each record.
+        binary (bool): If True, an item is counted once per group. Otherwise, the
+            cells hold the number of times an item appears in a group.
+
+    Returns:
+        X (`scipy.sparse.csr_matrix`): Incidence matrix.
+        group_index (`pd.Index`): Group of each row.
+        item_index (`pd.Index`): Item of each column, sorted.
+
+    """
+    group_codes, group_index = pd.factorize(np.asarray(groups))
+    item_codes, item_index = pd.factorize(np.asarray(items), sort=True)
+    valid = (group_codes >= 0) & (item_codes >= 0)
+
+    # Duplicate records are summed
+    X = sparse.csr_matrix(
+        (
+            np.ones(valid.sum(), dtype=np.int64),
+            (group_codes[valid], item_codes[valid]),
+        ),
+        shape=(len(group_index), len(item_index)),
+    )
+    if binary:
+        X.data[:] = 1
+
+    return X, pd.Index(group_index), pd.Index(item_index)
+
+
+def cooccurrence_pairs(X, min_weight=1):
+    """Co-occurrences of every pair of distinct items of an incidence matrix.
+
+    Args:
+        X (`scipy.sparse.spmatrix`): Group × item incidence matrix.
+        min_weight (int): Pairs that co-occur fewer times are dropped.
+
+    Returns:
+        rows (`np.ndarray`): Column of the first item of each pair.
+        cols (`np.ndarray`): Column of the second item of each pair, always greater
+            than `rows`.
+        weights (`np.ndarray`): Number of co-occurrences of each pair.
+
+    """
+    # Upper triangle without the diagonal, so that A,B and B,A are counted once
+    C = sparse.triu(X.T @ X, k=1).tocoo()
+    keep = C.data >= min_weight
+    return C.row[keep], C.col[keep], C.data[keep]
+
+
+def cooccurrence(df, item, group="paper_id", by=None, min_weight=1):
+    """Counts how many groups each pair of items appears in together.
+
+    Args:
+        df (`pd.DataFrame`): One row per group and item, e.g. paper-FoS pairs.
+        item (str): Column of the items, e.g. FoS names, countries or affiliations.
+        group (str): Column of the groups.
+        by (:obj:`list` of str): Columns to slice the records by (e.g. `type`,
+            `year`). Pairs are counted separately in every slice.
+        min_weight (int): Pairs that co-occur fewer times in a slice are dropped.
+
+    Returns:
+        (`pd.DataFrame`): The `by` columns, the two items of each pair (`item_a` <
+            `item_b`) and their co-occurrences (`weight`).
+
+    """
+    by = by or []
+    slices = df.groupby(by, observed=True) if by else [((), df)]
+
+    frames = []
+    for key, part in slices:
+        X, _, items = incidence_matrix(part[group], part[item])
+        rows, cols, weights = cooccurrence_pairs(X, min_weight)
+
+        frame = pd.DataFrame(
+            {"item_a": items[rows], "item_b": items[cols], "weight": weights}
+        )
+        key = key if isinstance(key, tuple) else (key,)
+        for i, (col, value) in enumerate(zip(by, key)):
+            frame.insert(i, col, value)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=by + ["item_a", "item_b", "weight"])
+    return pd.concat(frames, ignore_index=True)
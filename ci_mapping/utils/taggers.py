@@ -0,0 +1,122 @@
+"""
+Seed-list taggers. Each tagger is compiled once from a seed list in model_config.yaml
+and then flags names with 1 (match) or 0 (no match).
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class Tagger(ABC):
+    """Base class of seed-list taggers."""
+
+    @abstractmethod
+    def tag(self, name):
+        """Tags a name.
+
+        Args:
+            name (str): Name to tag.
+
+        Returns:
+            (int): 1 if the name matches the seed list, 0 otherwise.
+
+        """
+
+    def tag_many(self, names):
+        """Tags a batch of names.
+
+        Args:
+            names (:obj:`list` of str): Names to tag.
+
+        Returns:
+            (:obj:`list` of int)
+
+        """
+        return [self.tag(name) for name in names]
+
+
+class ExactTagger(Tagger):
+    """Flags names that are in the seed list, using a hash set.
+
+    Args:
+        seeds (:obj:`list` of str): Seed list.
+
+    """
+
+    def __init__(self, seeds):
+        self.seeds = frozenset(seeds)
+
+    def tag(self, name):
+        return int(name in self.seeds)
+
+
+class SubstringTagger(Tagger):
+    """Flags names that contain any phrase of the seed list. The phrases are
+    compiled in an Aho-Corasick automaton, so each name is scanned once regardless
+    of the length of the seed list.
+
+    Args:
+        seeds (:obj:`list` of str): Seed list.
+
+    """
+
+    def __init__(self, seeds):
+        # Trie of the seed phrases
+        self._goto = [{}]
+        self._match = [False]
+        for seed in seeds:
+            node = 0
+            for char in seed:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._match.append(False)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._match[node] = True
+
+        # Failure links, built breadth-first
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._match[child] = (
+                    self._match[child] or self._match[self._fail[child]]
+                )
+                queue.append(child)
+
+        # An empty seed matches every name
+        self._match_all = self._match[0]
+
+    def tag(self, name):
+        if self._match_all:
+            return 1
+
+        node = 0
+        for char in name:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._match[node]:
+                return 1
+        return 0
+
+
+TAGGERS = {"exact": ExactTagger, "substring": SubstringTagger}
+
+
+def build_tagger(seeds, match="exact"):
+    """Compiles a tagger for a seed list.
+
+    Args:
+        seeds (:obj:`list` of str): Seed list.
+        match (str): Matching rule, one of `TAGGERS`.
+
+    Returns:
+        (`Tagger`)
+
+    """
+    return TAGGERS[match](seeds)
@@ -1,7 +1,8 @@
-from itertools import chain, combinations
-from collections import OrderedDict, Counter
+from itertools import chain
+from collections import OrderedDict, Counter, defaultdict
 from datetime import datetime
 import numpy as np
+from ci_mapping.utils.cooccurrence import incidence_matrix, cooccurrence_pairs
 
 
 def inverted2abstract(obj):
@@ -80,15 +81,22 @@ def cooccurrence_graph(elements):
         (`collections.Counter`) of the form Counter({('country_a, country_b), weight})
 
     """
-    # Get a list of all of the combinations you have
-    expanded = [tuple(combinations(d, 2)) for d in elements]
-    expanded = chain(*expanded)
+    groups = [i for i, d in enumerate(elements) for _ in d]
+    X, _, items = incidence_matrix(groups, flatten_lists(elements), binary=False)
 
-    # Sort the combinations so that A,B and B,A are treated the same
-    expanded = [tuple(sorted(d)) for d in expanded]
+    # Pairs of distinct elements, sorted so that A,B and B,A are treated the same
+    rows, cols, weights = cooccurrence_pairs(X)
+    counts = Counter(
+        {(items[a], items[b]): int(w) for a, b, w in zip(rows, cols, weights)}
+    )
 
-    # count the combinations
-    return Counter(expanded)
+    # An element that appears n times in a list is paired n * (n - 1) / 2 times
+    # with itself
+    repeats = (X.multiply(X).sum(axis=0).A1 - X.sum(axis=0).A1) // 2
+    for i in np.flatnonzero(repeats):
+        counts[(items[i], items[i])] = int(repeats[i])
+
+    return counts
 
 
 def allocate_in_group(lst, fos_subset, tag="CI", fos_subset_tag="AI_CI"):
@@ -109,6 +117,41 @@ def allocate_in_group(lst, fos_subset, tag="CI", fos_subset_tag="AI_CI"):
         return tag
 
 
+def transitive_closure(edges):
+    """Computes the transitive closure of a hierarchy.
+
+    Args:
+        edges (:obj:`list` of :obj:`tuple`): (parent, child) pairs.
+
+    Returns:
+        (:obj:`list` of :obj:`tuple`): (ancestor, descendant, depth) triples, where
+            depth is the length of the shortest path between the two nodes. Every
+            node is its own ancestor at depth 0.
+
+    """
+    children = defaultdict(set)
+    nodes = set()
+    for parent, child in edges:
+        children[parent].add(child)
+        nodes.update([parent, child])
+
+    closure = []
+    for node in nodes:
+        depths = {node: 0}
+        frontier = [node]
+        while frontier:
+            next_frontier = []
+            for n in frontier:
+                for child in children[n]:
+                    if child not in depths:
+                        depths[child] = depths[n] + 1
+                        next_frontier.append(child)
+            frontier = next_frontier
+        closure.extend((node, child, depth) for child, depth in depths.items())
+
+    return closure
+
+
 def str2datetime(input_date):
     """Transform a string to datetime object.
 
@@ -142,3 +185,36 @@ def date_range(start, end, intv):
     for i in range(intv):
         yield (start + diff * i).strftime("%Y-%m-%d")
     yield end.strftime("%Y-%m-%d")
+
+
+def shard_windows(windows, n_shards):
+    """Distributes date windows to shards in a round-robin fashion, so that recent
+    windows, which usually hold more papers, are spread across the shards.
+
+    Args:
+        windows (:obj:`list` of :obj:`tuple`): Start and end date of each window.
+        n_shards (int): Number of shards.
+
+    Returns:
+        (:obj:`list` of :obj:`list`): Windows of each shard. Empty shards are
+            dropped.
+
+    """
+    shards = [windows[i::n_shards] for i in range(n_shards)]
+    return [shard for shard in shards if shard]
+
+
+def select_key(keys, index=0):
+    """Picks one of several API keys in a round-robin fashion.
+
+    Args:
+        keys (str): API keys separated by commas.
+        index (int): Index of the caller, e.g. of a shard. Callers with consecutive
+            indices get different keys.
+
+    Returns:
+        (str): API key or None if no key is given.
+
+    """
+    keys = [key.strip() for key in (keys or "").split(",") if key.strip()]
+    return keys[index % len(keys)] if keys else None
@@ -0,0 +1,70 @@
+import os
+import pytest
+import pandas as pd
+from unittest import mock
+
+from ci_mapping.data.artifacts import FrameRef
+from ci_mapping.data.artifacts import file_fingerprint
+from ci_mapping.data.artifacts import prune_runs
+
+
+def test_frame_ref_round_trip(tmp_path):
+    df = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "type": pd.Categorical(["CI", "AI_CI"]),
+            "month_year": pd.PeriodIndex(["2019-01", "2020-02"], freq="M"),
+        }
+    )
+
+    ref = FrameRef.save(df, "data", tmp_path)
+
+    assert ref.path == str(tmp_path / "data.parquet")
+    assert ref.fingerprint == file_fingerprint(ref.path)
+    pd.testing.assert_frame_equal(ref.load(), df)
+    pd.testing.assert_frame_equal(ref.load(columns=["id"]), df[["id"]])
+
+
+def test_frame_ref_keeps_index(tmp_path):
+    df = pd.DataFrame(
+        {"type": ["CI", "CI"], "year": ["2019", "2020"], "count": [1, 2]}
+    ).set_index(["type", "year"])
+
+    ref = FrameRef.save(df, "cube", tmp_path)
+
+    pd.testing.assert_frame_equal(ref.load(), df)
+
+
+def test_frame_ref_detects_changes(tmp_path):
+    ref = FrameRef.save(pd.DataFrame({"a": [1]}), "a", tmp_path)
+    FrameRef.save(pd.DataFrame({"a": [2]}), "a", tmp_path)
+
+    with pytest.raises(ValueError):
+        ref.load()
+
+
+def test_frame_ref_hashes_only_changed_files(tmp_path):
+    ref = FrameRef.save(pd.DataFrame({"a": [1]}), "a", tmp_path)
+
+    with mock.patch(
+        "ci_mapping.data.artifacts.file_fingerprint", wraps=file_fingerprint
+    ) as fingerprint:
+        ref.load()
+        ref.load()
+        assert fingerprint.call_count == 0
+
+        # Touched but unchanged files are hashed once
+        os.utime(ref.path, ns=(0, 0))
+        ref.load()
+        ref.load()
+        assert fingerprint.call_count == 1
+
+
+def test_prune_runs_keeps_the_most_recent_runs(tmp_path):
+    for i, run in enumerate(["1", "2", "3"]):
+        FrameRef.save(pd.DataFrame({"a": [1]}), "a", tmp_path / run)
+        os.utime(tmp_path / run, ns=(i, i))
+
+    assert prune_runs(tmp_path, keep=2) == ["1"]
+    assert sorted(run.name for run in tmp_path.iterdir()) == ["2", "3"]
+    assert prune_runs(tmp_path / "missing", keep=2) == []
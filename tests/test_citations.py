@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+from ci_mapping.analysis.citations import citation_matrix
+from ci_mapping.analysis.citations import in_corpus_citations
+from ci_mapping.analysis.citations import pagerank
+from ci_mapping.analysis.citations import cocitations
+
+papers = pd.DataFrame(
+    {
+        "id": [10, 20, 30, 40],
+        "references": [[20, 30, 99], [30, 30, 20], [], np.nan],
+    }
+)
+
+
+def test_citation_matrix():
+    C, ids = citation_matrix(papers)
+
+    assert list(ids) == [10, 20, 30, 40]
+    assert C.toarray().tolist() == [
+        [0, 1, 1, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+    ]
+
+
+def test_in_corpus_citations():
+    C, _ = citation_matrix(papers)
+
+    assert in_corpus_citations(C).tolist() == [0, 1, 2, 0]
+
+
+def test_pagerank_matches_networkx():
+    C, ids = citation_matrix(papers)
+    G = nx.DiGraph()
+    G.add_nodes_from(ids)
+    G.add_edges_from([(10, 20), (10, 30), (20, 30)])
+
+    expected = nx.pagerank(G, alpha=0.85)
+
+    result = pagerank(C, damping=0.85)
+    assert np.allclose(result, [expected[id_] for id_ in ids])
+    assert np.isclose(result.sum(), 1)
+
+
+def test_cocitations():
+    C, ids = citation_matrix(papers)
+    result = cocitations(C, ids)
+
+    assert result.to_dict("records") == [
+        {"paper_a": 20, "paper_b": 30, "cocitations": 1, "similarity": 1 / np.sqrt(2)}
+    ]
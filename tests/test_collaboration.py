@@ -0,0 +1,38 @@
+import pandas as pd
+
+from ci_mapping.analysis.collaboration import paper_collaborations
+from ci_mapping.analysis.collaboration import collaboration_share
+
+paper_author_aff = pd.DataFrame(
+    {
+        "paper_id": [1, 1, 1, 2, 2, 3],
+        "affiliation_id": [10, 10, 20, 10, 30, 40],
+        "type": ["CI", "CI", "CI", "CI", "CI", "AI_CI"],
+        "year": ["2019"] * 6,
+        "non_company": [0, 0, 1, 0, 0, 1],
+    }
+)
+aff_location = pd.DataFrame(
+    {"affiliation_id": [10, 20, 30], "country": ["UK", "US", "UK"]}
+)
+
+
+def test_paper_collaborations():
+    papers = paper_collaborations(paper_author_aff, aff_location)
+
+    assert papers.n_countries.to_dict() == {1: 2, 2: 1, 3: 0}
+    assert papers.n_sectors.to_dict() == {1: 2, 2: 1, 3: 1}
+    assert papers.cross_country.to_dict() == {1: True, 2: False, 3: False}
+    assert papers.cross_sector.to_dict() == {1: True, 2: False, 3: False}
+    assert papers.type.to_dict() == {1: "CI", 2: "CI", 3: "AI_CI"}
+
+
+def test_collaboration_share():
+    papers = paper_collaborations(paper_author_aff, aff_location)
+
+    countries = collaboration_share(papers, "countries")
+    sectors = collaboration_share(papers, "sectors", by=["type"])
+
+    # Paper 3 has no geocoded affiliations
+    assert countries.to_dict() == {("CI", "2019"): 50}
+    assert sectors.to_dict() == {"AI_CI": 0, "CI": 50}
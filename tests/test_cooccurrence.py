@@ -0,0 +1,61 @@
+import pandas as pd
+
+from ci_mapping.utils.cooccurrence import incidence_matrix
+from ci_mapping.utils.cooccurrence import cooccurrence_pairs
+from ci_mapping.utils.cooccurrence import cooccurrence
+
+
+def test_incidence_matrix():
+    X, groups, items = incidence_matrix([1, 1, 1, 2, 2], ["b", "a", "a", "c", None])
+
+    assert list(groups) == [1, 2]
+    assert list(items) == ["a", "b", "c"]
+    assert X.toarray().tolist() == [[1, 1, 0], [0, 0, 1]]
+
+
+def test_incidence_matrix_counts():
+    X, _, _ = incidence_matrix([1, 1, 1], ["b", "a", "a"], binary=False)
+
+    assert X.toarray().tolist() == [[2, 1]]
+
+
+def test_cooccurrence_pairs():
+    X, _, items = incidence_matrix(
+        [1, 1, 1, 2, 2, 3, 3], ["a", "b", "c", "a", "b", "a", "c"]
+    )
+    rows, cols, weights = cooccurrence_pairs(X, min_weight=2)
+
+    assert [(items[a], items[b], w) for a, b, w in zip(rows, cols, weights)] == [
+        ("a", "b", 2),
+        ("a", "c", 2),
+    ]
+
+
+def test_cooccurrence_by_slice():
+    df = pd.DataFrame(
+        {
+            "paper_id": [1, 1, 2, 2, 3, 3],
+            "name": ["a", "b", "b", "a", "a", "c"],
+            "type": ["CI", "CI", "CI", "CI", "AI_CI", "AI_CI"],
+        }
+    )
+    result = cooccurrence(df, "name", by=["type"])
+
+    expected = pd.DataFrame(
+        {
+            "type": ["AI_CI", "CI"],
+            "item_a": ["a", "a"],
+            "item_b": ["c", "b"],
+            "weight": [1, 2],
+        }
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_cooccurrence_min_weight():
+    df = pd.DataFrame(
+        {"paper_id": [1, 1, 2, 2, 3, 3], "name": ["a", "b", "b", "a", "a", "c"]}
+    )
+    result = cooccurrence(df, "name", min_weight=2)
+
+    assert result.to_dict("records") == [{"item_a": "a", "item_b": "b", "weight": 2}]
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.mag_orm import Paper
+from ci_mapping.data.mag_orm import PaperFieldsOfStudy
+from ci_mapping.data.mag_orm import CoreControlGroup
+from ci_mapping.data.mag_orm import FosCooccurrence
+from ci_mapping.data.mag_orm import FosCooccurrencePaper
+from ci_mapping.data.cooccurrence_counts import update_fos_cooccurrence
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(engine)()
+    s.bulk_insert_mappings(
+        Paper, [{"id": 1, "year": "2019"}, {"id": 2, "year": "2019"}]
+    )
+    s.bulk_insert_mappings(
+        PaperFieldsOfStudy,
+        [
+            {"paper_id": 1, "field_of_study_id": 10},
+            {"paper_id": 1, "field_of_study_id": 20},
+            {"paper_id": 2, "field_of_study_id": 10},
+            {"paper_id": 2, "field_of_study_id": 20},
+            {"paper_id": 2, "field_of_study_id": 30},
+        ],
+    )
+    s.bulk_insert_mappings(CoreControlGroup, [{"id": 1, "type": "CI"}])
+    yield s
+    s.close()
+
+
+def counts(s):
+    return {
+        (row.item_a, row.item_b, row.type, row.year): row.weight
+        for row in s.query(FosCooccurrence)
+    }
+
+
+def test_update_fos_cooccurrence_counts_tagged_papers(session):
+    n_papers = update_fos_cooccurrence(session)
+
+    assert n_papers == 1
+    assert counts(session) == {(10, 20, "CI", "2019"): 1}
+    assert {row.id for row in session.query(FosCooccurrencePaper)} == {1}
+
+
+def test_update_fos_cooccurrence_adds_new_papers(session):
+    update_fos_cooccurrence(session)
+    session.add(CoreControlGroup(id=2, type="CI"))
+
+    n_papers = update_fos_cooccurrence(session)
+
+    assert n_papers == 1
+    assert counts(session) == {
+        (10, 20, "CI", "2019"): 2,
+        (10, 30, "CI", "2019"): 1,
+        (20, 30, "CI", "2019"): 1,
+    }
+    assert update_fos_cooccurrence(session) == 0
+
+
+def test_update_fos_cooccurrence_rebuild(session):
+    update_fos_cooccurrence(session)
+    session.query(CoreControlGroup).update({"type": "AI_CI"})
+
+    n_papers = update_fos_cooccurrence(session, rebuild=True)
+
+    assert n_papers == 1
+    assert counts(session) == {(10, 20, "AI_CI", "2019"): 1}
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from ci_mapping.analysis.cube import build_cube
+from ci_mapping.analysis.cube import analysis_cube
+
+
+def test_build_cube():
+    df = pd.DataFrame(
+        {
+            "paper_id": [1, 1, 2, 3],
+            "type": ["CI", "CI", "CI", "AI_CI"],
+            "year": ["2019", "2019", "2019", "2020"],
+            "non_company": [0, 0, 1, 0],
+        }
+    )
+
+    cube = build_cube(df, ["non_company"])
+
+    assert cube.index.names == ["type", "year", "non_company"]
+    assert cube.loc[("CI", "2019", 0)].tolist() == [2, 1]
+    assert cube.loc[("CI", "2019", 1)].tolist() == [1, 1]
+    assert cube.loc[("AI_CI", "2020", 0)].tolist() == [1, 1]
+
+
+def test_analysis_cube():
+    data = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "type": pd.Categorical(["CI", "CI", "AI_CI"]),
+            "year": pd.Categorical(["2019", "2020", "2020"]),
+            "citations": [1, 2, 4],
+        }
+    )
+    aff_papers = pd.DataFrame(
+        {"paper_id": [1, 3], "type": ["CI", "AI_CI"], "year": ["2019", "2020"]}
+    ).assign(non_company=[1, 0])
+    journals = pd.DataFrame(
+        {"id": [10, 10, 20], "journal_name": ["a", "a", "b"], "paper_id": [1, 2, 3]}
+    )
+    open_access = pd.DataFrame({"id": [10, 20], "open_access": [0, 1]})
+    conferences = pd.DataFrame({"id": [30], "conference_name": ["c"], "paper_id": [2]})
+
+    cube = analysis_cube(data, aff_papers, journals, open_access, conferences)
+
+    assert cube["papers"].loc[("CI", "2020"), "citations"] == 2
+    assert cube["papers"].loc[("AI_CI", "2020"), "count"] == 1
+    assert cube["open_access"].loc[("AI_CI", "2020", 1), "papers"] == 1
+    assert cube["journals"]["count"].sum() == 3
+    assert cube["conferences"].loc[("CI", "2020", "c"), "count"] == 1
+    assert cube["affiliation_type"].loc[("CI", "2019", 1), "papers"] == 1
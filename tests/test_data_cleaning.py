@@ -0,0 +1,96 @@
+import pytest
+from functools import partial
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.mag_orm import Paper
+from ci_mapping.data.mag_orm import CoreControlGroup
+from ci_mapping.data.snapshot import read_table
+from ci_mapping.analysis.data_cleaning import clean_data
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(engine)()
+    s.bulk_insert_mappings(
+        Paper,
+        [
+            {
+                "id": 1,
+                "year": "2019",
+                "date": "2019-05-01",
+                "citations": 3,
+                "publication_type": "1",
+                "bibtex_doc_type": "a",
+                "doi": "10.1/a",
+                "publisher": "NaN",
+                "references": "[10, 20]",
+                "abstract": "A long abstract.",
+            },
+            {
+                "id": 2,
+                "year": "2020",
+                "date": "2020-01-15",
+                "citations": 0,
+                "publication_type": "0",
+                "bibtex_doc_type": "NaN",
+                "doi": "NaN",
+                "publisher": "Springer",
+                "references": "NaN",
+                "abstract": "NaN",
+            },
+        ],
+    )
+    s.bulk_insert_mappings(
+        CoreControlGroup, [{"id": 1, "type": "CI"}, {"id": 2, "type": "AI_CI"}]
+    )
+    s.commit()
+    yield s
+    s.close()
+
+
+def test_clean_data(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "ci_mapping.analysis.data_cleaning.read_table",
+        partial(read_table, snapshot_dir=tmp_path),
+    )
+    mag = clean_data(session).sort_values("id").reset_index(drop=True)
+
+    assert "abstract" not in mag.columns
+    assert mag.publication_type.tolist()[0] == "Journal article"
+    assert np.isnan(mag.publication_type.tolist()[1])
+    assert mag.bibtex_doc_type.tolist()[0] == "Journal article"
+    assert np.isnan(mag.bibtex_doc_type.tolist()[1])
+    assert np.isnan(mag.publisher[0])
+    assert np.isnan(mag.doi[1])
+    assert mag.citations.dtype == np.int8
+    for col in ["type", "year", "publication_type", "bibtex_doc_type"]:
+        assert mag[col].dtype == "category"
+    assert str(mag.month_year[1]) == "2020-01"
+
+
+def test_clean_data_parses_references(session, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "ci_mapping.analysis.data_cleaning.read_table",
+        partial(read_table, snapshot_dir=tmp_path),
+    )
+    mag = clean_data(
+        session,
+        columns=[
+            "id",
+            "year",
+            "date",
+            "citations",
+            "publication_type",
+            "bibtex_doc_type",
+            "references",
+        ],
+    )
+    mag = mag.sort_values("id").reset_index(drop=True)
+
+    assert mag.references[0] == [10, 20]
+    assert np.isnan(mag.references[1])
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import Column
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import Integer
+
+from ci_mapping.data import db_session
+from ci_mapping.data.db_session import get_engine
+from ci_mapping.data.db_session import session_scope
+from ci_mapping.data.db_session import stream
+
+Base = declarative_base()
+
+
+class Foo(Base):
+    __tablename__ = "foo"
+
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setenv("test_db", f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(get_engine("test_db"))
+    yield "test_db"
+    db_session.dispose_engines()
+
+
+def test_get_engine_is_shared(db):
+    assert get_engine(db) is get_engine(db)
+
+
+def test_session_scope_commits(db):
+    with session_scope(db) as s:
+        s.add(Foo(id=1))
+
+    with session_scope(db) as s:
+        assert [foo.id for foo in s.query(Foo)] == [1]
+
+
+def test_session_scope_rolls_back_on_error(db):
+    with pytest.raises(ValueError):
+        with session_scope(db) as s:
+            s.add(Foo(id=1))
+            s.flush()
+            raise ValueError
+
+    with session_scope(db) as s:
+        assert s.query(Foo).count() == 0
+
+
+def test_stream_yields_all_rows(db):
+    with session_scope(db) as s:
+        s.add_all([Foo(id=i) for i in range(5)])
+
+    with session_scope(db) as s:
+        assert sorted(id_[0] for id_ in stream(s.query(Foo.id), 2)) == list(range(5))
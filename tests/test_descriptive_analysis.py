@@ -0,0 +1,34 @@
+import pandas as pd
+from unittest import mock
+
+from ci_mapping.analysis.descriptive_analysis import annual_fields_of_study_usage
+
+
+@mock.patch("ci_mapping.analysis.descriptive_analysis._fos_plot")
+def test_annual_fields_of_study_usage(_fos_plot, tmp_path):
+    data = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "type": pd.Categorical(["CI", "CI", "AI_CI", "CI"]),
+            "year": pd.Categorical(["2019", "2019", "2019", "2020"]),
+        }
+    )
+    pfos = pd.DataFrame(
+        {"paper_id": [1, 2, 3, 4], "field_of_study_id": [10, 10, 20, 20]}
+    )
+    fos_metadata = pd.DataFrame(
+        {"id": [10, 20], "name": ["crowdsourcing", "machine learning"], "level": [1, 1]}
+    )
+
+    # Keep the figure cache out of the working tree
+    with mock.patch("ci_mapping.project_dir", tmp_path):
+        annual_fields_of_study_usage(data, pfos, fos_metadata, fos_levels=[1])
+
+    df = _fos_plot.call_args[0][0].set_index(["type", "year", "name"])
+    # Every (type, year, FoS) combination is present
+    assert len(df) == 8
+    assert df.loc[("CI", 2019, "crowdsourcing"), "fraq"] == 100
+    assert df.loc[("AI_CI", 2019, "machine learning"), "fraq"] == 100
+    assert df.loc[("CI", 2020, "machine learning"), "fraq"] == 100
+    assert df.loc[("AI_CI", 2020, "crowdsourcing"), "paper_id"] == 0
+    assert df.loc[("AI_CI", 2020, "crowdsourcing"), "fraq"] == 0
@@ -0,0 +1,86 @@
+import inspect
+import pandas as pd
+from unittest import mock
+
+from ci_mapping.analysis import collaboration
+from ci_mapping.analysis.collaboration import collaboration_share
+from ci_mapping.analysis.figure_cache import cached_figure
+from ci_mapping.analysis.figure_cache import figure_fingerprint
+from ci_mapping.analysis.figure_cache import output_path
+
+calls = []
+
+
+@cached_figure
+def _figure(df, top_n=10, filename="figure"):
+    calls.append(filename)
+    paths = [output_path(name) for name in [filename, f"{filename}_{top_n}"]]
+    for path in paths:
+        with open(path, "w") as h:
+            h.write(str(len(df)))
+    return paths
+
+
+def _share_figure(papers):
+    return collaboration_share(papers, "countries")
+
+
+def test_figure_fingerprint():
+    df = pd.DataFrame({"a": [1, 2], "b": pd.Categorical(["x", "y"])})
+
+    fingerprint = figure_fingerprint(_figure, [df], {})
+
+    assert fingerprint == figure_fingerprint(_figure, [df.copy()], {"top_n": 10})
+    assert fingerprint != figure_fingerprint(_figure, [df], {"top_n": 5})
+    assert fingerprint != figure_fingerprint(_figure, [df.iloc[:1]], {})
+
+
+def test_cached_figure_skips_unchanged_inputs(tmp_path):
+    (tmp_path / "reports" / "figures").mkdir(parents=True)
+    df = pd.DataFrame({"a": [1, 2]})
+    calls.clear()
+
+    with mock.patch("ci_mapping.project_dir", tmp_path):
+        outputs = _figure(df)
+        assert _figure(df) == outputs
+        assert calls == ["figure"]
+        assert (tmp_path / "reports" / "figures" / "figure.html.fingerprint").exists()
+
+        # New inputs
+        _figure(df, top_n=5)
+        assert calls == ["figure", "figure"]
+
+        # figure.html was overwritten by the previous call
+        _figure(df)
+        assert calls == ["figure", "figure", "figure"]
+
+        # A deleted output is rendered again
+        (tmp_path / "reports" / "figures" / "figure_10.html").unlink()
+        _figure(df)
+        assert calls == ["figure", "figure", "figure", "figure"]
+
+
+def test_figure_fingerprint_covers_imported_helpers():
+    df = pd.DataFrame({"a": [1, 2]})
+    fingerprint = figure_fingerprint(_share_figure, [df], {})
+    getsource = inspect.getsource
+
+    def edited(obj):
+        return getsource(obj) + ("# edited" if obj is collaboration else "")
+
+    with mock.patch("ci_mapping.analysis.figure_cache.inspect.getsource", edited):
+        assert fingerprint != figure_fingerprint(_share_figure, [df], {})
+
+
+def test_figure_fingerprint_covers_module_constants():
+    df = pd.DataFrame({"a": [1, 2]})
+    fingerprint = figure_fingerprint(_figure, [df], {})
+    getsource = inspect.getsource
+
+    def edited(obj):
+        return getsource(obj) + (
+            "TOP_N = 5" if obj is inspect.getmodule(_figure) else ""
+        )
+
+    with mock.patch("ci_mapping.analysis.figure_cache.inspect.getsource", edited):
+        assert fingerprint != figure_fingerprint(_figure, [df], {})
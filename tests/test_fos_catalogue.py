@@ -0,0 +1,104 @@
+import json
+import pytest
+
+from ci_mapping.data.fos_catalogue import FosCatalogue
+from ci_mapping.data.parse_mag_data import parse_fos_hierarchy
+
+records = [
+    {"id": 41008148, "name": "Computer science", "level": 0},
+    {
+        "id": 119857082,
+        "name": "Machine learning",
+        "level": 1,
+        "parent_ids": [41008148],
+        "child_ids": [108583219],
+    },
+    {"id": 9, "name": "Café", "level": 2, "parent_ids": [1, 2]},
+]
+
+
+def test_lookup_returns_found_and_missing():
+    catalogue = FosCatalogue.from_records(records)
+
+    found, missing = catalogue.lookup([119857082, 5, 9, 2**40])
+
+    assert found == [
+        {
+            "id": 119857082,
+            "name": "Machine learning",
+            "level": 1,
+            "parent_ids": [41008148],
+            "child_ids": [108583219],
+        },
+        {"id": 9, "name": "Café", "level": 2, "parent_ids": [1, 2], "child_ids": []},
+    ]
+    assert missing == [5, 2**40]
+
+
+def test_lookup_in_empty_catalogue(tmp_path):
+    catalogue = FosCatalogue.load(tmp_path)
+
+    assert len(catalogue) == 0
+    assert catalogue.lookup([1, 2]) == ([], [1, 2])
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    FosCatalogue.from_records(records).save(tmp_path)
+
+    catalogue = FosCatalogue.load(tmp_path)
+
+    assert len(catalogue) == 3
+    assert catalogue.lookup([41008148]) == (
+        [
+            {
+                "id": 41008148,
+                "name": "Computer science",
+                "level": 0,
+                "parent_ids": [],
+                "child_ids": [],
+            }
+        ],
+        [],
+    )
+
+
+def test_merge_creates_new_revision(tmp_path):
+    FosCatalogue.from_records(records[:1]).save(tmp_path)
+
+    FosCatalogue.load(tmp_path).merge(records[1:]).save(tmp_path)
+    catalogue = FosCatalogue.load(tmp_path)
+
+    assert catalogue.revision == 1
+    assert sorted(r["id"] for r in catalogue.records()) == [9, 41008148, 119857082]
+
+
+def test_concurrent_saves_use_separate_revisions(tmp_path):
+    base = FosCatalogue.from_records(records[:1])
+    first, second = base.merge(records[1:2]), base.merge(records[2:])
+
+    first.save(tmp_path)
+    second.save(tmp_path)
+    catalogue = FosCatalogue.load(tmp_path)
+
+    assert (first.revision, second.revision) == (1, 2)
+    assert catalogue.revision == 2
+    assert (tmp_path / "r000001" / "manifest.json").exists()
+    assert sorted(r["id"] for r in catalogue.records()) == [9, 41008148]
+
+
+def test_catalogue_hits_give_the_same_hierarchy_as_the_api():
+    response = records[1]
+    catalogue = FosCatalogue.from_records(records)
+
+    (hit,), _ = catalogue.lookup([response["id"]])
+
+    assert parse_fos_hierarchy(hit) == parse_fos_hierarchy(response)
+
+
+def test_load_rejects_unknown_formats(tmp_path):
+    FosCatalogue.from_records(records).save(tmp_path)
+    manifest = tmp_path / "r000000" / "manifest.json"
+    manifest.write_text(json.dumps({"format": 0, "revision": 0, "size": 3}))
+
+    with pytest.raises(ValueError):
+        FosCatalogue.load(tmp_path)
@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+from unittest import mock
+
+from ci_mapping.data.gazetteer import Gazetteer
+from ci_mapping.data.gazetteer import tokenize
+from ci_mapping.data.geocode import geocode_place
+from ci_mapping.data.geocode import location_row
+
+gazetteer_csv = """id,name,lat,lng,city,region,country,website
+grid.1,University of Oxford,51.75,-1.25,Oxford,England,United Kingdom,http://ox.ac.uk
+grid.2,Oxford Brookes University,51.75,-1.22,Oxford,England,United Kingdom,
+grid.3,Columbia University,40.80,-73.96,New York,New York,United States,
+grid.4,University of Athens,37.97,23.78,Athens,,Greece,
+"""
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    path = tmp_path / "gazetteer.csv"
+    path.write_text(gazetteer_csv)
+    return Gazetteer.from_csv(path, min_score=0.8)
+
+
+def test_tokenize():
+    assert tokenize("Université d'Athènes") == ["université", "d", "athènes"]
+
+
+def test_exact_and_fuzzy_matches(gazetteer):
+    assert gazetteer.match("university of oxford") == (0, 1.0)
+    assert gazetteer.match("Columbia University in the City of New York") is None
+    assert gazetteer.match("columbia university ") == (2, 1.0)
+    assert gazetteer.match("oxford brookes")[0] == 1
+    assert gazetteer.match("university oxford") is None
+    assert gazetteer.match("foo bar") is None
+
+    index, score = Gazetteer(gazetteer.places, min_score=0.5).match("university oxford")
+    assert index == 0
+    assert 0.5 < score < 1
+
+
+def test_geocode_returns_parse_response_format(gazetteer):
+    result = gazetteer.geocode("University of Athens")
+
+    assert result["id"] == "grid.4"
+    assert result["lat"] == 37.97
+    assert result["address"] == "Athens, Greece"
+    assert result["country"] == "Greece"
+    assert np.isnan(result["administrative_area_level_1"])
+    assert np.isnan(result["website"])
+    assert set(result) == {
+        "lat",
+        "lng",
+        "address",
+        "name",
+        "id",
+        "types",
+        "website",
+        "postal_town",
+        "administrative_area_level_2",
+        "administrative_area_level_1",
+        "country",
+    }
+
+
+@mock.patch("ci_mapping.data.geocode.place_by_name", autospec=True)
+def test_geocode_place_falls_back_to_api(place_by_name, gazetteer):
+    place_by_name.return_value = None
+
+    assert geocode_place("University of Oxford", "123", gazetteer=gazetteer)["id"] == (
+        "grid.1"
+    )
+    assert place_by_name.call_count == 0
+
+    assert geocode_place("Mozilla London", None, gazetteer=gazetteer) is None
+    assert place_by_name.call_count == 0
+
+    assert geocode_place("Mozilla London", "123", gazetteer=gazetteer) is None
+    assert place_by_name.call_count == 1
+
+
+def test_gazetteer_locations_are_keyed_by_affiliation(gazetteer):
+    row = location_row(1, gazetteer.geocode("University of Oxford"))
+
+    assert row["affiliation_id"] == 1
+    assert row["id"] == "grid.1"
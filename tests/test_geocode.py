@@ -1,9 +1,17 @@
+import time
 import pytest
 from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 from ci_mapping.data.geocode import parse_response
 from ci_mapping.data.geocode import place_by_id
 from ci_mapping.data.geocode import place_by_name
+from ci_mapping.data.geocode import geocode_places
+from ci_mapping.data.geocode import RateLimiter
+from ci_mapping.data.geocode import location_row
+from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.mag_orm import AffiliationLocation
 
 FIND_PLACE = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json?"
 PLACE_DETAILS = "https://maps.googleapis.com/maps/api/place/details/json?"
@@ -116,3 +124,59 @@ def test_parse_google_place_api_response():
     }
 
     assert parse_response(api_response) == expected_response
+
+
+def _place_details(place_id):
+    return {
+        "result": {
+            "geometry": {"location": {"lat": 1.0, "lng": 2.0}},
+            "formatted_address": "foo",
+            "name": place_id,
+            "place_id": place_id,
+            "types": [],
+            "website": "bar",
+            "address_components": [{"long_name": "Greece", "types": ["country"]}],
+        }
+    }
+
+
+@mock.patch("ci_mapping.data.geocode.place_by_id", autospec=True)
+@mock.patch("ci_mapping.data.geocode.place_by_name", autospec=True)
+def test_geocode_places_returns_details_for_every_place(place_by_name, place_by_id):
+    place_by_name.side_effect = lambda name, key: None if name == "nowhere" else name
+    place_by_id.side_effect = lambda id, key: _place_details(id)
+    places = [(i, f"place {i}") for i in range(20)] + [(20, "nowhere")]
+
+    result = dict(geocode_places(places, "123", max_workers=4, qps=None))
+
+    assert set(result) == set(range(21))
+    assert result[20] is None
+    assert result[3]["id"] == "place 3"
+    assert result[3]["country"] == "Greece"
+    assert place_by_id.call_count == 20
+
+
+def test_rate_limiter_spaces_out_calls():
+    limiter = RateLimiter(qps=100)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+
+    assert time.monotonic() - start >= 0.05
+
+
+def test_affiliations_in_the_same_place_are_stored():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(engine)()
+    details = parse_response(_place_details("place 1"))
+    details["types"] = None
+
+    s.bulk_insert_mappings(
+        AffiliationLocation, [location_row(1, details), location_row(2, details)]
+    )
+    s.commit()
+
+    result = {row.affiliation_id: row.id for row in s.query(AffiliationLocation)}
+    assert result == {1: "place 1", 2: "place 1"}
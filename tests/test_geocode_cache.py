@@ -0,0 +1,90 @@
+import time
+import pytest
+import numpy as np
+from unittest import mock
+
+from ci_mapping.data.geocode import geocode_place
+from ci_mapping.data.geocode_cache import GeocodeCache
+from ci_mapping.data.geocode_cache import MISSING
+from ci_mapping.data.geocode_cache import normalise_name
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = GeocodeCache(tmp_path / "cache.sqlite", ttl_days=1, negative_ttl_days=1)
+    yield cache
+    cache.close()
+
+
+def test_normalise_name():
+    assert normalise_name("  Columbia   University ") == "columbia university"
+
+
+def test_place_ids_and_misses_are_cached(cache):
+    assert cache.get_place_id("Mozilla London") is MISSING
+
+    cache.set_place_id("Mozilla London", "abc123")
+    cache.set_place_id("nowhere", None)
+
+    assert cache.get_place_id("mozilla  london") == "abc123"
+    assert cache.get_place_id("nowhere") is None
+
+
+def test_details_roundtrip(cache):
+    details = {"id": "abc123", "lat": 1.0, "website": np.nan, "types": ["foo"]}
+    cache.set_details("abc123", details)
+
+    result = cache.get_details("abc123")
+
+    assert result["types"] == ["foo"]
+    assert np.isnan(result["website"])
+    assert cache.get_details("xyz") is None
+
+
+def test_expired_entries_are_missing_and_evicted(cache):
+    cache.set_place_id("Mozilla London", "abc123")
+    cache.set_details("abc123", {"id": "abc123"})
+
+    later = time.time() + 2 * 86400
+    with mock.patch("ci_mapping.data.geocode_cache.time.time", return_value=later):
+        assert cache.get_place_id("Mozilla London") is MISSING
+        assert cache.get_details("abc123") is None
+        assert cache.evict() == 2
+
+
+@mock.patch("ci_mapping.data.geocode.place_by_id", autospec=True)
+@mock.patch("ci_mapping.data.geocode.place_by_name", autospec=True)
+def test_geocode_place_fetches_each_place_once(place_by_name, place_by_id, cache):
+    place_by_name.side_effect = lambda name, key: None if name == "nowhere" else "abc"
+    place_by_id.return_value = {
+        "result": {
+            "geometry": {"location": {"lat": 1.0, "lng": 2.0}},
+            "formatted_address": "foo",
+            "name": "Foo",
+            "place_id": "abc",
+            "types": [],
+            "website": "bar",
+            "address_components": [],
+        }
+    }
+
+    for name in ["Foo", "Foo Ltd", "nowhere", "Foo", "nowhere"]:
+        geocode_place(name, "123", cache=cache)
+
+    assert place_by_name.call_count == 3
+    assert place_by_id.call_count == 1
+    assert geocode_place("Foo Ltd", "123", cache=cache)["id"] == "abc"
+
+
+@mock.patch("ci_mapping.data.geocode.requests.get", autospec=True)
+def test_throttled_requests_are_not_cached(get, cache):
+    get.return_value.json.return_value = {
+        "candidates": [],
+        "status": "OVER_QUERY_LIMIT",
+    }
+    assert geocode_place("Foo", "123", cache=cache) is None
+    assert cache.get_place_id("Foo") is MISSING
+
+    get.return_value.json.return_value = {"candidates": [], "status": "ZERO_RESULTS"}
+    assert geocode_place("Foo", "123", cache=cache) is None
+    assert cache.get_place_id("Foo") is None
@@ -0,0 +1,65 @@
+import pandas as pd
+from scipy import sparse
+
+from ci_mapping.analysis.networks import frequent_fields_of_study
+from ci_mapping.analysis.networks import fos_cooccurrence_network
+from ci_mapping.analysis.networks import collaboration_network
+from ci_mapping.analysis.networks import node_metrics
+from ci_mapping.analysis.networks import save_network
+
+pfos = pd.DataFrame(
+    {
+        "paper_id": [1, 1, 1, 2, 2, 2, 3, 3],
+        "field_of_study_id": [10, 20, 30, 10, 20, 30, 10, 40],
+        "name": ["a", "b", "c", "a", "b", "c", "a", "d"],
+        "level": [1, 1, 2, 1, 1, 2, 1, 0],
+    }
+)
+
+
+def test_frequent_fields_of_study():
+    result = frequent_fields_of_study(pfos, {1: 1, 2: 2})
+
+    assert result == {"a", "b"}
+
+
+def test_fos_cooccurrence_network():
+    G = fos_cooccurrence_network(pfos, {1: 0, 2: 0}, edge_threshold=1)
+
+    assert sorted(G.edges(data="weight")) == [
+        ("a", "b", 2),
+        ("a", "c", 2),
+        ("b", "c", 2),
+    ]
+    assert "d" not in G
+
+
+collaborations = pd.DataFrame(
+    {"paper_id": [1, 1, 1, 2, 2, 3], "author_id": [7, 8, 9, 7, 8, 9]}
+)
+
+
+def test_collaboration_network():
+    adjacency, ids = collaboration_network(collaborations, "author_id")
+
+    assert list(ids) == [7, 8, 9]
+    assert ids.name == "author_id"
+    assert adjacency.toarray().tolist() == [[0, 2, 1], [2, 0, 1], [1, 1, 0]]
+
+
+def test_node_metrics():
+    adjacency, ids = collaboration_network(collaborations, "author_id")
+    result = node_metrics(adjacency, ids)
+
+    assert result.degree.tolist() == [2, 2, 2]
+    assert result.strength.tolist() == [3, 3, 2]
+    assert result.index.name == "author_id"
+
+
+def test_save_network(tmp_path):
+    adjacency, ids = collaboration_network(collaborations, "author_id")
+    save_network(adjacency, ids, "authors", tmp_path)
+
+    assert (sparse.load_npz(tmp_path / "authors.npz") != adjacency).nnz == 0
+    nodes = pd.read_parquet(tmp_path / "authors_nodes.parquet")
+    assert nodes.author_id.tolist() == [7, 8, 9]
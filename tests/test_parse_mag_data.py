@@ -6,6 +6,7 @@ from ci_mapping.data.parse_mag_data import parse_affiliations
 from ci_mapping.data.parse_mag_data import parse_authors
 from ci_mapping.data.parse_mag_data import parse_fos
 from ci_mapping.data.parse_mag_data import parse_journal
+from ci_mapping.data.parse_mag_data import parse_fos_hierarchy
 
 test_example = {
     "logprob": -17.825,
@@ -108,3 +109,21 @@ def test_parse_affiliations():
 
     assert affiliations == expected_result_affiliations
     assert paper_author_aff == expected_result_author_with_aff
+
+
+def test_parse_fos_hierarchy():
+    response = {
+        "id": 119857082,
+        "name": "Machine learning",
+        "level": 1,
+        "parent_ids": [41008148],
+        "child_ids": [108583219, 12267149],
+    }
+    expected_result = [
+        {"parent_id": 41008148, "child_id": 119857082},
+        {"parent_id": 119857082, "child_id": 108583219},
+        {"parent_id": 119857082, "child_id": 12267149},
+    ]
+
+    assert parse_fos_hierarchy(response) == expected_result
+    assert parse_fos_hierarchy({"id": 1, "level": 0}) == []
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from ci_mapping.analysis.render import SpilledFrame
+from ci_mapping.analysis.render import render_figures
+from ci_mapping.data.artifacts import FrameRef
+
+
+def _write_figure(df, path, suffix=""):
+    with open(path, "w") as h:
+        h.write(f"{len(df)}{suffix}")
+
+
+def test_spilled_frame_round_trip(tmp_path):
+    df = pd.DataFrame(
+        {
+            "type": pd.Categorical(["CI", "AI_CI"]),
+            "year": pd.Categorical(["2019", "2020"]),
+            "count": [3, 4],
+            "month_year": pd.PeriodIndex(["2019-01", "2020-02"], freq="M"),
+        }
+    ).set_index(["type", "year"])
+
+    spilled = SpilledFrame.spill(df, str(tmp_path / "df.feather"))
+
+    pd.testing.assert_frame_equal(spilled.load(), df)
+
+
+def test_spilled_frame_drops_unnamed_index(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, 3]}).iloc[1:]
+
+    spilled = SpilledFrame.spill(df, str(tmp_path / "df.feather"))
+
+    assert spilled.load().a.tolist() == [2, 3]
+    assert spilled.index == []
+
+
+def test_render_figures(tmp_path):
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    figures = [
+        (_write_figure, [df, str(tmp_path / "a")], {}),
+        (_write_figure, [df, str(tmp_path / "b")], {"suffix": "!"}),
+    ]
+
+    render_figures(figures, max_workers=2, spill_dir=str(tmp_path))
+
+    assert (tmp_path / "a").read_text() == "3"
+    assert (tmp_path / "b").read_text() == "3!"
+    # The Arrow files are removed
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "b"]
+
+
+def test_render_figures_sequentially(tmp_path):
+    figures = [(_write_figure, [[1, 2], str(tmp_path / "a")], {})]
+
+    render_figures(figures, max_workers=1)
+
+    assert (tmp_path / "a").read_text() == "2"
+
+
+def test_render_figures_loads_frame_refs(tmp_path):
+    ref = FrameRef.save(pd.DataFrame({"a": [1, 2]}), "a", tmp_path)
+    figures = [
+        (_write_figure, [ref, str(tmp_path / "a")], {}),
+        (_write_figure, [ref, str(tmp_path / "b")], {}),
+    ]
+
+    for max_workers in [1, 2]:
+        render_figures(figures, max_workers=max_workers, spill_dir=str(tmp_path))
+
+        assert (tmp_path / "a").read_text() == "2"
+        assert (tmp_path / "b").read_text() == "2"
@@ -0,0 +1,113 @@
+import pytest
+import pandas as pd
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.mag_orm import Journal
+from ci_mapping.data.mag_orm import Paper
+from ci_mapping.data.snapshot import read_table
+from ci_mapping.data.snapshot import mark_loaded
+from ci_mapping.data.snapshot import last_loaded
+from ci_mapping.data.snapshot import table_fingerprint
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(engine)()
+    s.bulk_insert_mappings(Paper, [{"id": 1}, {"id": 2}])
+    s.bulk_insert_mappings(
+        Journal,
+        [
+            {"id": 10, "journal_name": "science", "paper_id": 1},
+            {"id": 20, "journal_name": "nature", "paper_id": 2},
+        ],
+    )
+    s.commit()
+    yield s
+    s.close()
+
+
+def test_table_fingerprint(session):
+    fingerprint = table_fingerprint(session, Journal)
+    assert fingerprint == {
+        "table": "mag_paper_journal",
+        "rows": 2,
+        "max_key": 2,
+        "load": None,
+    }
+
+    mark_loaded(session, [Journal], "42")
+    assert table_fingerprint(session, Journal)["load"][0] == "42"
+
+
+def test_last_loaded(session):
+    assert last_loaded(session, Journal) is None
+
+    mark_loaded(session, [Journal], "1")
+    first = last_loaded(session, Journal)
+    mark_loaded(session, [Journal], "2")
+
+    assert last_loaded(session, Journal) >= first
+    assert last_loaded(session, Paper) is None
+
+
+def test_read_table_uses_snapshot_until_table_changes(session, tmp_path):
+    df = read_table(session, Journal, snapshot_dir=tmp_path)
+    assert sorted(df.journal_name) == ["nature", "science"]
+
+    with mock.patch("ci_mapping.data.snapshot.pd.read_sql") as read_sql:
+        df = read_table(
+            session,
+            Journal,
+            columns=["paper_id", "journal_name"],
+            snapshot_dir=tmp_path,
+        )
+        assert read_sql.call_count == 0
+    assert list(df.columns) == ["paper_id", "journal_name"]
+
+    mark_loaded(session, [Journal], "43")
+    with mock.patch("ci_mapping.data.snapshot.pd.read_sql", autospec=True) as read_sql:
+        read_table(session, Journal, snapshot_dir=tmp_path)
+        assert read_sql.call_count == 1
+
+
+def test_read_table_selects_only_the_projection(session, tmp_path):
+    with mock.patch(
+        "ci_mapping.data.snapshot.pd.read_sql", wraps=pd.read_sql
+    ) as read_sql:
+        df = read_table(session, Paper, columns=["id", "year"], snapshot_dir=tmp_path)
+        statement = str(read_sql.call_args[0][0])
+    assert list(df.columns) == ["id", "year"]
+    assert "abstract" not in statement
+
+    with mock.patch("ci_mapping.data.snapshot.pd.read_sql") as read_sql:
+        df = read_table(session, Paper, columns=["year", "id"], snapshot_dir=tmp_path)
+        assert read_sql.call_count == 0
+    assert list(df.columns) == ["year", "id"]
+    assert len(list(tmp_path.glob("*/mag_papers*.parquet"))) == 1
+
+
+def test_read_table_keeps_databases_apart(session, tmp_path):
+    read_table(session, Journal, snapshot_dir=tmp_path / "snapshots")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    Base.metadata.create_all(engine)
+    other = sessionmaker(engine)()
+    other.bulk_insert_mappings(Paper, [{"id": 1}, {"id": 2}])
+    other.bulk_insert_mappings(
+        Journal,
+        [
+            {"id": 30, "journal_name": "cell", "paper_id": 1},
+            {"id": 40, "journal_name": "pnas", "paper_id": 2},
+        ],
+    )
+    other.commit()
+
+    df = read_table(other, Journal, snapshot_dir=tmp_path / "snapshots")
+    other.close()
+
+    assert sorted(df.journal_name) == ["cell", "pnas"]
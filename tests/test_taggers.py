@@ -0,0 +1,49 @@
+import pytest
+
+from ci_mapping.utils.taggers import Tagger
+from ci_mapping.utils.taggers import ExactTagger
+from ci_mapping.utils.taggers import SubstringTagger
+from ci_mapping.utils.taggers import build_tagger
+
+seeds = ["university", "nhs trust", "institut", "uni", "she", "hers"]
+names = [
+    "columbia university",
+    "google",
+    "nhs lothian",
+    "nhs trust for wales",
+    "max planck institute",
+    "ushers",
+    "",
+    "deepmind",
+]
+
+
+def test_substring_tagger_matches_any_seed():
+    tagger = SubstringTagger(seeds)
+
+    expected_result = [int(any(seed in name for seed in seeds)) for name in names]
+
+    assert tagger.tag_many(names) == expected_result
+    assert expected_result == [1, 0, 0, 1, 1, 1, 0, 0]
+
+
+def test_substring_tagger_with_empty_seed_list():
+    assert SubstringTagger([]).tag_many(names) == [0] * len(names)
+
+
+def test_exact_tagger():
+    tagger = ExactTagger(["arxiv learning", "biorxiv"])
+
+    assert tagger.tag_many(["biorxiv", "arxiv", "nature"]) == [1, 0, 0]
+
+
+def test_build_tagger():
+    assert isinstance(build_tagger(seeds, match="substring"), SubstringTagger)
+    assert isinstance(build_tagger(seeds), ExactTagger)
+    with pytest.raises(KeyError):
+        build_tagger(seeds, match="fuzzy")
+
+
+def test_tagger_requires_tag():
+    with pytest.raises(TypeError):
+        Tagger()
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ci_mapping.data.mag_orm import Base
+from ci_mapping.data.mag_orm import Paper
+from ci_mapping.data.mag_orm import FieldOfStudy
+from ci_mapping.data.mag_orm import PaperFieldsOfStudy
+from ci_mapping.data.mag_orm import CoreControlGroup
+from ci_mapping.data.tagging import tag_core_control_group
+from ci_mapping.data.tagging import seed_fingerprint
+from ci_mapping.data.tagging import prepare_tag_table
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(engine)()
+    s.bulk_insert_mappings(Paper, [{"id": 1}, {"id": 2}, {"id": 3}])
+    s.bulk_insert_mappings(
+        FieldOfStudy,
+        [
+            {"id": 10, "name": "AI", "norm_name": "ai"},
+            {"id": 20, "name": "CI", "norm_name": "ci"},
+        ],
+    )
+    s.bulk_insert_mappings(
+        PaperFieldsOfStudy,
+        [
+            {"paper_id": 1, "field_of_study_id": 10},
+            {"paper_id": 1, "field_of_study_id": 20},
+            {"paper_id": 2, "field_of_study_id": 20},
+        ],
+    )
+    yield s
+    s.close()
+
+
+def test_tag_core_control_group(session):
+    counts = tag_core_control_group(session, ["ai"])
+
+    result = {row.id: row.type for row in session.query(CoreControlGroup)}
+    assert result == {1: "AI_CI", 2: "CI"}
+    assert counts == {"AI_CI": 1, "CI": 1}
+
+
+def test_tag_core_control_group_skips_tagged_papers(session):
+    session.add(CoreControlGroup(id=2, type="AI_CI"))
+
+    counts = tag_core_control_group(session, ["ai"])
+
+    result = {row.id: row.type for row in session.query(CoreControlGroup)}
+    assert result == {1: "AI_CI", 2: "AI_CI"}
+    assert counts == {"AI_CI": 1, "CI": 0}
+
+
+def test_seed_fingerprint():
+    assert seed_fingerprint(["a", "b"], "exact") == seed_fingerprint(
+        ["b", "a"], "exact"
+    )
+    assert seed_fingerprint(["a"], "exact") != seed_fingerprint(["a"], "substring")
+    assert seed_fingerprint(["a"], "exact") != seed_fingerprint(["a", "b"], "exact")
+
+
+def test_prepare_tag_table_rebuilds_only_when_rules_change(session):
+    fingerprint = seed_fingerprint(["ai"], "fos_subset")
+    assert prepare_tag_table(session, CoreControlGroup, fingerprint)
+    tag_core_control_group(session, ["ai"])
+
+    assert not prepare_tag_table(session, CoreControlGroup, fingerprint)
+    assert session.query(CoreControlGroup).count() == 2
+
+    fingerprint = seed_fingerprint(["ci"], "fos_subset")
+    assert prepare_tag_table(session, CoreControlGroup, fingerprint)
+    assert session.query(CoreControlGroup).count() == 0
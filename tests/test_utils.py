@@ -6,6 +6,9 @@ from ci_mapping.utils.utils import unique_dicts
 from ci_mapping.utils.utils import unique_dicts_by_value
 from ci_mapping.utils.utils import cooccurrence_graph
 from ci_mapping.utils.utils import allocate_in_group
+from ci_mapping.utils.utils import transitive_closure
+from ci_mapping.utils.utils import shard_windows
+from ci_mapping.utils.utils import select_key
 
 example_list_dict = [
     {"DFN": "Biology", "FId": 86803240},
@@ -83,3 +86,38 @@ def test_allocate_in_groups_ai_ci():
     result = allocate_in_group(lst, ai_lst)
 
     assert result == expected_result
+
+
+def test_transitive_closure():
+    edges = [("a", "b"), ("b", "c"), ("a", "c"), ("d", "c")]
+
+    expected_result = [
+        ("a", "a", 0),
+        ("a", "b", 1),
+        ("a", "c", 1),
+        ("b", "b", 0),
+        ("b", "c", 1),
+        ("c", "c", 0),
+        ("d", "c", 1),
+        ("d", "d", 0),
+    ]
+    result = transitive_closure(edges)
+
+    assert sorted(result) == expected_result
+
+
+def test_shard_windows():
+    windows = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("e", "f")]
+
+    assert shard_windows(windows, 2) == [
+        [("a", "b"), ("c", "d"), ("e", "f")],
+        [("b", "c"), ("d", "e")],
+    ]
+    assert shard_windows(windows[:1], 3) == [[("a", "b")]]
+
+
+def test_select_key():
+    assert select_key("k1, k2", 0) == "k1"
+    assert select_key("k1, k2", 3) == "k2"
+    assert select_key("k1") == "k1"
+    assert select_key(None) is None